@@ -3,12 +3,15 @@
 
 import sys
 import os
-from .console import AdvancedConsole, Console
+from .console import Console
 import logging
 from . import config
 from . import tools as Tools
-from .cleepapi import CleepApi
+from .cleepapi import CleepApi, resolve_rpc_url
+from .inventory import ModuleInventory, get_inventory
+from .checkcache import CheckCache
 import importlib
+import importlib.metadata
 try:
     from cleep.common import CATEGORIES
     APP_CATEGORIES_CHECK_DISABLED = False
@@ -16,10 +19,12 @@ except:
     APP_CATEGORIES_CHECK_DISABLED = True
 import re
 import inspect
-import glob
 import copy
 import json
+import hashlib
 import time
+import ast
+import configparser
 
 class Check():
     """
@@ -271,12 +276,90 @@ overgeneral-exceptions=Exception
 
     VERSION_UNRELEASED = 'UNRELEASED'
 
-    def __init__(self):
+    # messages computed on all linted files instead of one file
+    PYLINT_CROSS_FILES_SYMBOLS = {
+        'duplicate-code': 'R0801',
+        'cyclic-import': 'R0401',
+    }
+    PYLINT_EVALUATION = '0 if fatal else 10.0 - ((float(5 * error + warning + refactor + convention) / statement) * 10)'
+    PYLINT_CATEGORIES = {
+        'F': 'fatal',
+        'E': 'error',
+        'W': 'warning',
+        'R': 'refactor',
+        'C': 'convention',
+    }
+
+    __rules_digest = None
+
+    def __init__(self, use_cache=True):
+        """
+        Constructor
+
+        Args:
+            use_cache (bool): serve results of unchanged modules from persistent checks cache
+        """
         self.logger = logging.getLogger(self.__class__.__name__)
+        self.__cleepapi = None
+        self.__cache = CheckCache(self.__get_rules_digest()) if use_cache else None
 
-        rpc_url = Tools.get_cleep_url()
-        self.logger.debug('Cleep RPC url: %s', rpc_url)
-        self.cleepapi = CleepApi(rpc_url)
+    @classmethod
+    def __get_rules_digest(cls):
+        """
+        Return digest of checks rules (this file contains all rules and pylintrc, linter and its version)
+
+        Returns:
+            string: rules digest
+        """
+        if not cls.__rules_digest:
+            digest = hashlib.sha1()
+            for filename in ('check.py', 'lint.py'):
+                with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), filename), 'rb') as fdesc:
+                    digest.update(fdesc.read())
+            try:
+                digest.update(importlib.metadata.version('pylint').encode('utf-8'))
+            except importlib.metadata.PackageNotFoundError:
+                pass
+            cls.__rules_digest = digest.hexdigest()
+        return cls.__rules_digest
+
+    def __run_cached(self, module_name, check_name, roots, params, check_func, files=None, is_cacheable=None):
+        """
+        Run check or return its cached result if its input files did not change
+
+        Args:
+            module_name (string): module name
+            check_name (string): check name
+            roots (list): directories whose files are check inputs
+            params (list): check parameters
+            check_func (function): check function
+            files (list): other input files
+            is_cacheable (function): function returning False if check result must not be cached
+
+        Returns:
+            any: check result
+        """
+        if not self.__cache:
+            return check_func()
+
+        key = self.__cache.get_key(module_name, check_name, roots, params, files)
+        result = self.__cache.get(module_name, check_name, key)
+        if result is None:
+            result = check_func()
+            if not is_cacheable or is_cacheable(result):
+                self.__cache.set(module_name, check_name, key, result)
+        return result
+
+    def __get_cleepapi(self):
+        """
+        Return Cleep api instance, Cleep RPC url is resolved at first call only
+
+        Returns:
+            CleepApi: Cleep api instance
+        """
+        if not self.__cleepapi:
+            self.__cleepapi = CleepApi(resolve_rpc_url())
+        return self.__cleepapi
 
     def check_backend(self, module_name, module_author=None):
         """
@@ -307,6 +390,23 @@ overgeneral-exceptions=Exception
         if not os.path.exists(os.path.join(config.MODULES_DST, module_name)):
             raise Exception('Module "%s" does not exist' % module_name)
 
+        # module is validated against installed cleep (version, categories)
+        return self.__run_cached(
+            module_name,
+            'backend',
+            [os.path.join(config.MODULES_DST, module_name)],
+            [module_author, config.CORE_DST, APP_CATEGORIES_CHECK_DISABLED],
+            lambda: self.__check_backend(module_name, module_author),
+            files=[
+                os.path.join(config.CORE_DST, '__init__.py'),
+                os.path.join(config.CORE_DST, 'common.py'),
+            ],
+        )
+
+    def __check_backend(self, module_name, module_author=None):
+        """
+        Check backend (see check_backend)
+        """
         # get module instance
         try:
             module_ = importlib.import_module(u'cleep.modules.%s' % (module_name))
@@ -511,45 +611,36 @@ overgeneral-exceptions=Exception
         """
         class_path = inspect.getfile(class_).replace('.pyc', '.py')
         module_path = class_path.rsplit('/',1)[0]
+        module_dir = os.path.basename(module_path)
 
-        fullpaths = glob.glob(module_path + '/**/*', recursive=True)
         out = {
             'module': {},
             'files': [],
             'initpy': [],
             'folders': [],
         }
-        for fullpath in fullpaths:
+        for entry in get_inventory().get(module_path):
             # drop useless files
-            fileext = os.path.splitext(fullpath)[1]
-            if '__pycache__' in fullpath:
-                continue
-            if any([True for f in ['.pylintrc', ] if fullpath.find(f) >= 0]):
+            if entry.kind != ModuleInventory.KIND_FILE or entry.extension != '.py':
                 continue
-            if fileext != '.py':
+            if '__pycache__' in entry.path:
                 continue
 
-            if fullpath.endswith('__init__.py'):
+            fullpath = entry.fullpath
+            file_infos = {
+                'fullpath': fullpath,
+                'filename': entry.filename,
+                'path': '%s/%s' % (module_dir, entry.path),
+            }
+            if entry.filename == '__init__.py':
                 # handle __init__.py file
-                out['initpy'].append({
-                    'fullpath': fullpath,
-                    'filename': os.path.split(fullpath)[1],
-                    'path': fullpath.split('modules/')[1],
-                })
+                out['initpy'].append(file_infos)
             elif fullpath == class_path:
                 # handle main module
-                out['module'] = {
-                    'fullpath': fullpath,
-                    'filename': os.path.split(fullpath)[1],
-                    'path': fullpath.split('modules/')[1],
-                }
+                out['module'] = file_infos
             else:
                 # handle other file
-                out['files'].append({
-                    'fullpath': fullpath,
-                    'filename': os.path.split(fullpath)[1],
-                    'path': fullpath.split('modules/')[1],
-                })
+                out['files'].append(file_infos)
 
             # add scanned folders
             folder = os.path.dirname(fullpath)
@@ -818,6 +909,18 @@ overgeneral-exceptions=Exception
         if not os.path.exists(os.path.join(config.MODULES_DST, module_name)):
             raise Exception('Module "%s" does not exist' % module_name)
 
+        return self.__run_cached(
+            module_name,
+            'frontend',
+            [os.path.join(config.MODULES_HTML_DST, module_name)],
+            [],
+            lambda: self.__check_frontend(module_name),
+        )
+
+    def __check_frontend(self, module_name):
+        """
+        Check frontend (see check_frontend)
+        """
         out = {
             'errors': [],
             'warnings': [],
@@ -1129,26 +1232,24 @@ overgeneral-exceptions=Exception
 
         """
         module_path = os.path.join(config.MODULES_HTML_DST, module_name)
-        fullpaths = glob.glob(module_path + '/**/*', recursive=True)
         out = {
             'files': [],
         }
-        for fullpath in fullpaths:
+        for entry in get_inventory().get(module_path):
             # drop some files
-            filename = os.path.split(fullpath)[1]
-            if filename.startswith('.') or filename.startswith('~') or filename.endswith('.tmp'):
+            if entry.filename.startswith('~') or entry.filename.endswith('.tmp'):
                 continue
 
             # drop directories
-            if os.path.isdir(fullpath):
+            if entry.kind != ModuleInventory.KIND_FILE:
                 continue
 
             # store file infos
             out['files'].append({
-                'fullpath': fullpath,
-                'filename': filename,
-                'path': fullpath.split('modules/')[1],
-                'extension': os.path.splitext(fullpath)[1],
+                'fullpath': entry.fullpath,
+                'filename': entry.filename,
+                'path': '%s/%s' % (module_name, entry.path),
+                'extension': entry.extension,
             })
 
         return out
@@ -1181,19 +1282,18 @@ overgeneral-exceptions=Exception
         if not os.path.exists(os.path.join(config.MODULES_DST, module_name)):
             raise Exception('Module "%s" does not exist' % module_name)
 
-        scripts_path = os.path.join(config.MODULES_SRC, module_name, 'scripts')
-        fullpaths = glob.glob(scripts_path + '/**/*', recursive=True)
+        module_path = os.path.join(config.MODULES_SRC, module_name)
         out = {
             'errors': [],
             'warnings': [],
             'files': [],
         }
-        for fullpath in fullpaths:
+        for entry in get_inventory().get(module_path, 'scripts'):
             # store file infos
             out['files'].append({
-                'fullpath': fullpath,
-                'filename': os.path.split(fullpath)[1],
-                'path': fullpath.split('modules/%s/' % module_name)[1],
+                'fullpath': entry.fullpath,
+                'filename': entry.filename,
+                'path': entry.path,
             })
 
         return out
@@ -1226,27 +1326,24 @@ overgeneral-exceptions=Exception
         if not os.path.exists(os.path.join(config.MODULES_DST, module_name)):
             raise Exception('Module "%s" does not exist' % module_name)
 
-        scripts_path = os.path.join(config.MODULES_SRC, module_name, 'tests')
-        fullpaths = glob.glob(scripts_path + '/**/*', recursive=True)
+        module_path = os.path.join(config.MODULES_SRC, module_name)
         out = {
             'errors': [],
             'warnings': [],
             'files': [],
         }
-        for fullpath in fullpaths:
+        for entry in get_inventory().get(module_path, 'tests'):
             # drop some files
-            filename = os.path.split(fullpath)[1]
-            ext = os.path.splitext(fullpath)[1],
-            if filename.startswith('.') or filename.startswith('~') or filename.endswith('.tmp'):
+            if entry.filename.startswith('~') or entry.filename.endswith('.tmp'):
                 continue
-            if '__pycache__' in fullpath:
+            if '__pycache__' in entry.path:
                 continue
 
             # store file infos
             out['files'].append({
-                'fullpath': fullpath,
-                'filename': filename,
-                'path': fullpath.split('modules/%s/' % module_name)[1],
+                'fullpath': entry.fullpath,
+                'filename': entry.filename,
+                'path': entry.path,
             })
 
         # check mandatory files
@@ -1258,13 +1355,19 @@ overgeneral-exceptions=Exception
 
         return out
 
-    def check_code_quality(self, module_name, rewrite_pylintrc=False):
+    def check_code_quality(self, module_name, rewrite_pylintrc=False, jobs=None):
         """
         Check code quality running pylint on backend. Add .pylintrc if file is missing
 
+        Messages and statements count of each file are kept in checks cache and global score is computed
+        from all files data. A file is linted again only if it changed or if one of the backend modules it
+        imports (directly or not) changed. Cross files messages (duplicate-code, cyclic-import) are computed
+        on all files when any backend file changed.
+
         Args:
             module_name (string): module name
             rewrite_pylintrc (bool): True to rewrite .pylintrc file
+            jobs (int): number of pylint processes (default 1: lint in-process to reuse astroid cache)
 
         Returns:
             dict: result of pylint::
@@ -1272,18 +1375,14 @@ overgeneral-exceptions=Exception
             {
                 errors (list): list of errors::
                 {
-                    filename (string): {
-                        code (string): pylint code
-                        msg (string): pylint message
-                    }
-                }
-                warnings (list): list of warnings::
-                {
-                    filename (string): {
-                        code (string): pylint code
-                        msg (string): pylint message
-                    }
+                    code (string): pylint code
+                    msg (string): pylint message
+                    symbol (string): pylint message symbol
+                    filename (string): file name
+                    line (int): message line
+                    column (int): message column
                 }
+                warnings (list): list of warnings (same format than errors)
                 score (float): code quality score (/10)
             }
 
@@ -1299,46 +1398,298 @@ overgeneral-exceptions=Exception
                 pylintrc_file.write(self.PYLINTRC)
             time.sleep(3.0)
 
-        # launch pylint
-        self.logger.debug('Launch pylint')
-        cmd = 'cd "%s"; pylint *.py' % backend_path
-        pattern = r'^(.*?\.py):(\d+):(\d+): ([CRWEF]\d+): (.*)$|^.*at (\d+\.\d+)\/10.*$'
-        console = AdvancedConsole()
-        results = console.find(cmd, pattern, timeout=60, check_return_code=False)
-        self.logger.debug('Results: %s' % results)
+        return self.__run_cached(
+            module_name,
+            'code quality',
+            [backend_path],
+            [],
+            lambda: self.__check_code_quality(module_name, backend_path, pylintrc_path, jobs or 1),
+            files=[pylintrc_path],
+            # linter execution failure is not cached
+            is_cacheable=lambda result: all([error['code'] is not None for error in result['errors']]),
+        )
+
+    def __check_code_quality(self, module_name, backend_path, pylintrc_path, jobs):
+        """
+        Run pylint on backend files without cached result and compute score (see check_code_quality)
+        """
+        filenames = [
+            entry.filename
+            for entry in get_inventory().get(backend_path)
+            if '/' not in entry.path and entry.extension == '.py'
+        ]
+
+        fullpaths = dict([(filename, os.path.join(backend_path, filename)) for filename in filenames])
+
+        # get files results from cache, keyed on file and backend modules it imports (pylint infers them)
+        files_results = {}
+        files_keys = {}
+        cross_key = None
+        cross_result = None
+        if self.__cache:
+            dependencies = self.__get_backend_dependencies(module_name, backend_path, filenames)
+            for filename in filenames:
+                check_name = 'code quality:%s' % filename
+                files_keys[filename] = self.__cache.get_key(
+                    module_name,
+                    check_name,
+                    [],
+                    files=[fullpaths[dependency] for dependency in dependencies[filename]] + [pylintrc_path],
+                )
+                cached = self.__cache.get(module_name, check_name, files_keys[filename])
+                if cached is not None:
+                    files_results[filename] = cached
+            cross_key = self.__cache.get_key(
+                module_name, 'code quality:cross files', [], files=list(fullpaths.values()) + [pylintrc_path]
+            )
+            cross_result = self.__cache.get(module_name, 'code quality:cross files', cross_key)
+
+        # lint changed files
+        to_lint = [filename for filename in filenames if filename not in files_results]
+        self.logger.debug('Launch pylint on %d/%d files (%d jobs)' % (len(to_lint), len(filenames), jobs))
+        if to_lint or (filenames and cross_result is None):
+            # pylint is long to import
+            from .lint import CodeLinter
+            linter = CodeLinter()
+        if to_lint:
+            results = linter.lint(
+                [fullpaths[filename] for filename in to_lint],
+                pylintrc_path=pylintrc_path,
+                jobs=min(jobs, len(to_lint)),
+            )
+            cross_messages = []
+            for filename in to_lint:
+                result = self.__format_lint_result(filename, results[fullpaths[filename]])
+                if result is not None:
+                    # cross files messages are kept apart (only relevant if all files are linted)
+                    cross_messages += [
+                        message for message in result['messages']
+                        if message['symbol'] in self.PYLINT_CROSS_FILES_SYMBOLS
+                    ]
+                    result['messages'] = [
+                        message for message in result['messages']
+                        if message['symbol'] not in self.PYLINT_CROSS_FILES_SYMBOLS
+                    ]
+                files_results[filename] = result
+                if result is not None and self.__cache:
+                    self.__cache.set(module_name, 'code quality:%s' % filename, files_keys[filename], result)
+            if len(to_lint) == len(filenames) and all([files_results[filename] is not None for filename in to_lint]):
+                cross_result = cross_messages
+
+        # lint all files for cross files messages only
+        if filenames and cross_result is None:
+            cross_result = self.__lint_cross_files(linter, pylintrc_path, fullpaths)
+        if cross_result is not None and self.__cache:
+            self.__cache.set(module_name, 'code quality:cross files', cross_key, cross_result)
 
         out = {
             'errors': [],
             'warnings': [],
             'score': 0.0,
         }
-        if len(results) == 0:
+        stats = dict([(category, 0) for category in self.PYLINT_CATEGORIES.values()])
+        stats['statement'] = 0
+        failed = len(filenames) == 0 or cross_result is None
+        messages = []
+        for filename in filenames:
+            result = files_results[filename]
+            if result is None:
+                failed = True
+                continue
+            stats['statement'] += result['statements']
+            messages += result['messages']
+        for message in messages + (cross_result or []):
+                stats[self.PYLINT_CATEGORIES[message['code'][0]]] += 1
+                if message['code'][0] in ('E', 'F'):
+                    out['errors'].append(message)
+                else:
+                    out['warnings'].append(message)
+
+        if failed:
             out['errors'].append({
                 'code': None,
                 'msg': 'Internal error: linter execution failed. Please check your code.',
             })
-        for result in results:
-            group = list(filter(None, result[1]))
-            if len(group) == 5:
-                # pylint output
-                msg = '%s [%s %s:%s]' % (group[4], group[0], group[1], group[2])
-                if group[3].startswith('E') or group[3].startswith('F'):
-                    out['errors'].append({
-                        'code': group[3],
-                        'msg': msg
-                    })
-                else:
-                    out['warnings'].append({
-                        'code': group[3],
-                        'msg': msg,
-                    })
-            elif len(group) == 1:
-                # score
-                out['score'] = float(group[0])
+        elif stats['statement'] > 0:
+            out['score'] = self.__get_code_quality_score(pylintrc_path, stats)
 
         self.logger.debug('Code quality output: %s' % out)
         return out
 
+    def __lint_cross_files(self, linter, pylintrc_path, fullpaths):
+        """
+        Run pylint on all backend files for cross files messages only
+
+        Args:
+            linter (CodeLinter): linter instance
+            pylintrc_path (string): .pylintrc path
+            fullpaths (dict): backend files fullpaths by filename
+
+        Returns:
+            list: cross files messages or None if linter failed
+        """
+        disabled = self.__get_pylintrc_disabled(pylintrc_path)
+        enabled = [
+            symbol for symbol, code in self.PYLINT_CROSS_FILES_SYMBOLS.items()
+            if symbol not in disabled and code not in disabled
+        ]
+        if not enabled:
+            return []
+
+        results = linter.lint(
+            list(fullpaths.values()),
+            pylintrc_path=pylintrc_path,
+            args=['--disable=all', '--enable=%s' % ','.join(enabled)],
+        )
+        messages = []
+        for filename, fullpath in fullpaths.items():
+            result = self.__format_lint_result(filename, results[fullpath])
+            if result is None:
+                return None
+            messages += [message for message in result['messages'] if message['symbol'] in enabled]
+        return messages
+
+    def __get_pylintrc_disabled(self, pylintrc_path):
+        """
+        Return messages disabled in .pylintrc
+
+        Args:
+            pylintrc_path (string): .pylintrc path
+
+        Returns:
+            list: disabled messages symbols or codes
+        """
+        try:
+            pylintrc = configparser.ConfigParser(interpolation=None, strict=False)
+            pylintrc.read(pylintrc_path)
+            disable = pylintrc.get('MESSAGES CONTROL', 'disable', fallback='')
+        except configparser.Error:
+            return []
+
+        disabled = []
+        for line in disable.splitlines():
+            # inline comments are kept by configparser
+            disabled += [item.strip() for item in line.split('#')[0].split(',') if item.strip()]
+        return disabled
+
+    def __get_backend_dependencies(self, module_name, backend_path, filenames):
+        """
+        Return backend files each backend file depends on, following imports of backend modules
+
+        Args:
+            module_name (string): module name
+            backend_path (string): backend path
+            filenames (list): backend python files
+
+        Returns:
+            dict: sorted list of files (including itself) by filename
+        """
+        modules = dict([(os.path.splitext(filename)[0], filename) for filename in filenames])
+        package = 'cleep.modules.%s' % module_name
+
+        imports = {}
+        for filename in filenames:
+            imports[filename] = set()
+            try:
+                with open(os.path.join(backend_path, filename), 'rb') as fdesc:
+                    tree = ast.parse(fdesc.read(), filename)
+            except Exception:
+                # syntax error is reported by linter
+                continue
+
+            names = []
+            for node in ast.walk(tree):
+                if isinstance(node, ast.Import):
+                    names += [alias.name for alias in node.names]
+                elif isinstance(node, ast.ImportFrom):
+                    if node.level:
+                        # relative import within backend also loads package __init__
+                        names.append('__init__')
+                        base = node.module or ''
+                    else:
+                        base = node.module or ''
+                        base = base[len(package) + 1:] if base.startswith(package + '.') else base
+                    names += [base] + ['%s.%s' % (base, alias.name) if base else alias.name for alias in node.names]
+            for name in names:
+                name = name[len(package) + 1:] if name.startswith(package + '.') else name
+                if name.split('.')[0] in modules:
+                    imports[filename].add(modules[name.split('.')[0]])
+
+        dependencies = {}
+        for filename in filenames:
+            found = set()
+            to_process = [filename]
+            while to_process:
+                current = to_process.pop()
+                if current not in found:
+                    found.add(current)
+                    to_process += list(imports[current] - found)
+            dependencies[filename] = sorted(found)
+        return dependencies
+
+    def __get_code_quality_score(self, pylintrc_path, stats):
+        """
+        Compute code quality score like pylint does, using .pylintrc evaluation
+
+        Args:
+            pylintrc_path (string): .pylintrc path
+            stats (dict): messages count by category and statements count
+
+        Returns:
+            float: code quality score (/10)
+        """
+        evaluation = self.PYLINT_EVALUATION
+        try:
+            pylintrc = configparser.ConfigParser(interpolation=None, strict=False)
+            pylintrc.read(pylintrc_path)
+            evaluation = pylintrc.get('REPORTS', 'evaluation', fallback=evaluation)
+        except configparser.Error:
+            self.logger.debug('Unable to read .pylintrc evaluation, use default one')
+
+        try:
+            score = float(eval(evaluation, {}, stats))
+        except Exception as error:
+            self.logger.warning('Invalid .pylintrc evaluation "%s": %s' % (evaluation, error))
+            return 0.0
+
+        # negative score is not reported
+        return round(max(0.0, score), 2)
+
+    def __format_lint_result(self, filename, result):
+        """
+        Add file location to linter messages, msg is formatted like previous pylint text output
+
+        Args:
+            filename (string): linted file name
+            result (dict): linter result (see CodeLinter.lint)
+
+        Returns:
+            dict: file lint result or None if linter failed::
+
+            {
+                messages (list): list of messages::
+                {
+                    code (string): pylint code
+                    msg (string): pylint message with location (same format as pylint text output)
+                    symbol (string): pylint message symbol
+                    filename (string): file name
+                    line (int): message line
+                    column (int): message column
+                }
+                statements (int): number of statements analysed
+            }
+
+        """
+        if result is None:
+            return None
+
+        for message in result['messages']:
+            message['filename'] = filename
+            # msg is kept as it was parsed from pylint text output: first line of "<msg> (<symbol>)"
+            text = ('%s (%s)' % (message['msg'], message['symbol'])).split('\n')[0]
+            message['msg'] = '%s [%s %s:%s]' % (text, filename, message['line'], message['column'])
+        return result
+
     def check_changelog(self, module_name):
         """
         Check module changelog
@@ -1361,10 +1712,9 @@ overgeneral-exceptions=Exception
 
         # search for changelog.md file
         changelog_path = None
-        fullpaths = glob.glob(os.path.join(config.MODULES_SRC, module_name) + '/*')
-        for fullpath in fullpaths:
-            if os.path.basename(fullpath).lower() == 'changelog.md':
-                changelog_path = fullpath
+        for entry in get_inventory().get(os.path.join(config.MODULES_SRC, module_name)):
+            if '/' not in entry.path and entry.filename.lower() == 'changelog.md':
+                changelog_path = entry.fullpath
         if not changelog_path:
             raise Exception('Application changelog "changelog.md" does not exist. Please create it following https://keepachangelog.com/en/1.0.0/')
         self.logger.debug('Using changelog "%s"' % changelog_path)
@@ -1437,9 +1787,14 @@ overgeneral-exceptions=Exception
         console = Console()
         cmd = f"cleep --cicheckdoc={module_name}"
         self.logger.debug("Cmd: %s", cmd)
-        resp = console.command(cmd)
+        resp = console.command(cmd, 120)
         self.logger.debug("Cmd resp: %s", resp)
 
+        if resp["killed"]:
+            output["error"] = True
+            output["message"] = "Application documentation check timed out"
+            return output
+
         output["error"] = resp.get("returncode", 1) != 0
         output["message"] = None if resp.get("returncode", 1) == 0 else "Invalid application documentation"
         output["data"] = json.loads(''.join(resp.get("stdout", [])))
@@ -1457,7 +1812,7 @@ overgeneral-exceptions=Exception
             "data": None,
         }
         try:
-            resp = self.cleepapi.check_documentation(module_name)
+            resp = self.__get_cleepapi().check_documentation(module_name)
             self.logger.debug("Call resp: %s", resp)
 
             output["error"] = resp.get("error", True)
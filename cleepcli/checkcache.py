@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import copy
+import json
+import hashlib
+import logging
+from threading import Lock
+from . import config
+from .version import VERSION
+from .inventory import ModuleInventory, get_inventory
+
+class CheckCache():
+    """
+    Persistent cache of module checks results
+
+    A check result is cached with a key built from content hash of each check input file, cleep-cli version,
+    check rules, core version and check parameters. Files content hashes are kept per file and only
+    recomputed for files whose size or mtime changed, so an unchanged module is served from cache after a
+    few stats.
+
+    Cache is stored in one json file per module in CACHE_DIR/checks.
+    """
+
+    CACHE_FORMAT = 1
+    IGNORED_DIRS = ['__pycache__', 'node_modules']
+    IGNORED_EXTENSIONS = ['.pyc']
+
+    def __init__(self, rules, cache_dir=None):
+        """
+        Constructor
+
+        Args:
+            rules (string): check rules digest (cache is invalidated when rules change)
+            cache_dir (string): cache directory (default CACHE_DIR/checks)
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.rules = rules
+        self.cache_dir = cache_dir or os.path.join(config.CACHE_DIR, 'checks')
+        self.__lock = Lock()
+        self.__modules = {}
+
+    def __get_cache_path(self, module_name):
+        """
+        Return module cache file path
+
+        Args:
+            module_name (string): module name
+
+        Returns:
+            string: cache file path
+        """
+        return os.path.join(self.cache_dir, '%s.json' % module_name)
+
+    def __load(self, module_name):
+        """
+        Return module cache (lock must be acquired)
+
+        Args:
+            module_name (string): module name
+
+        Returns:
+            dict: module cache::
+
+                {
+                    format (int): cache format
+                    files (dict): files hashes {fullpath: [size, mtime_ns, sha1]}
+                    results (dict): checks results {check name: {key (string), result (any)}}
+                }
+
+        """
+        if module_name not in self.__modules:
+            cache = None
+            try:
+                with open(self.__get_cache_path(module_name)) as fdesc:
+                    cache = json.load(fdesc)
+                if cache.get('format') != self.CACHE_FORMAT:
+                    cache = None
+            except Exception:
+                # no cache or invalid cache
+                pass
+            self.__modules[module_name] = cache or {'format': self.CACHE_FORMAT, 'files': {}, 'results': {}}
+
+        return self.__modules[module_name]
+
+    def __save(self, module_name):
+        """
+        Save module cache (lock must be acquired)
+
+        Args:
+            module_name (string): module name
+        """
+        cache_path = self.__get_cache_path(module_name)
+        tmp_path = '%s.%s.tmp' % (cache_path, os.getpid())
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, 'w') as fdesc:
+                json.dump(self.__modules[module_name], fdesc)
+            os.replace(tmp_path, cache_path)
+        except (OSError, TypeError, ValueError) as error:
+            self.logger.debug('Unable to save checks cache of "%s": %s', module_name, error)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def __get_file_hash(self, files, fullpath):
+        """
+        Return file content hash, recomputed only if file changed (lock must be acquired)
+
+        Args:
+            files (dict): module files hashes
+            fullpath (string): file fullpath
+
+        Returns:
+            string: file content hash or None if file does not exist
+        """
+        try:
+            stat = os.stat(fullpath)
+        except OSError:
+            files.pop(fullpath, None)
+            return None
+
+        cached = files.get(fullpath)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+
+        sha1 = hashlib.sha1()
+        with open(fullpath, 'rb') as fdesc:
+            for block in iter(lambda: fdesc.read(65536), b''):
+                sha1.update(block)
+        files[fullpath] = [stat.st_size, stat.st_mtime_ns, sha1.hexdigest()]
+        return files[fullpath][2]
+
+    def __get_input_files(self, roots, files):
+        """
+        Return check input files
+
+        Args:
+            roots (list): directories whose files are check inputs
+            files (list): other input files
+
+        Returns:
+            list: sorted input files fullpaths
+        """
+        fullpaths = list(files or [])
+        for root in roots:
+            for entry in get_inventory().get(root):
+                if entry.kind != ModuleInventory.KIND_FILE or entry.extension in self.IGNORED_EXTENSIONS:
+                    continue
+                if any([folder in entry.path.split('/') for folder in self.IGNORED_DIRS]):
+                    continue
+                fullpaths.append(entry.fullpath)
+
+        return sorted(fullpaths)
+
+    def get_key(self, module_name, check_name, roots, params=None, files=None):
+        """
+        Return check cache key
+
+        Args:
+            module_name (string): module name
+            check_name (string): check name
+            roots (list): directories whose files are check inputs
+            params (list): check parameters
+            files (list): other input files (hidden files are not part of roots files)
+
+        Returns:
+            string: cache key
+        """
+        with self.__lock:
+            module_files = self.__load(module_name)['files']
+            hashes = [
+                (fullpath, self.__get_file_hash(module_files, fullpath))
+                for fullpath in self.__get_input_files(roots, files)
+            ]
+
+        key = hashlib.sha1(json.dumps([
+            VERSION,
+            self.rules,
+            config.CORE_VERSION,
+            check_name,
+            params or [],
+            hashes,
+        ]).encode('utf-8'))
+        return key.hexdigest()
+
+    def get(self, module_name, check_name, key):
+        """
+        Return cached check result
+
+        Args:
+            module_name (string): module name
+            check_name (string): check name
+            key (string): cache key (see get_key)
+
+        Returns:
+            any: cached result or None if not cached
+        """
+        with self.__lock:
+            cached = self.__load(module_name)['results'].get(check_name)
+
+        if cached and cached['key'] == key:
+            self.logger.debug('Check "%s" of "%s" served from cache', check_name, module_name)
+            return copy.deepcopy(cached['result'])
+        return None
+
+    def set(self, module_name, check_name, key, result):
+        """
+        Cache check result
+
+        Args:
+            module_name (string): module name
+            check_name (string): check name
+            key (string): cache key (see get_key)
+            result (any): check result (must be json serializable)
+        """
+        try:
+            # cached result must be returned as computed (tuples...)
+            result_json = json.loads(json.dumps(result))
+        except (TypeError, ValueError):
+            self.logger.debug('Check "%s" result of "%s" is not cacheable', check_name, module_name)
+            return
+        if result_json != result:
+            self.logger.debug('Check "%s" result of "%s" is not cacheable', check_name, module_name)
+            return
+
+        with self.__lock:
+            self.__load(module_name)['results'][check_name] = {'key': key, 'result': result_json}
+            self.__save(module_name)
+
+    def clear(self, module_name):
+        """
+        Drop module cache
+
+        Args:
+            module_name (string): module name
+        """
+        with self.__lock:
+            self.__modules.pop(module_name, None)
+            if os.path.exists(self.__get_cache_path(module_name)):
+                os.remove(self.__get_cache_path(module_name))
@@ -12,7 +12,7 @@ import urllib.parse
 from . import config
 from .console import Console
 from .check import Check
-from .cleepapi import resolve_rpc_url
+from .cleepapi import CleepApi, resolve_rpc_url, invalidate_rpc_url
 import subprocess
 
 requests.packages.urllib3.disable_warnings()
@@ -26,6 +26,13 @@ class Ci:
     TESTS_REQUIREMENTS_TXT = "tests/requirements.txt"
     EXTRACT_DIR = "/tmp/extract"
     APP_FILENAME_PATTERN = "APP_FILENAME=['\"](.*)['\"]"
+    RPC_TIMEOUT = 60.0
+    RPC_TIMEOUT_MARGIN = 10.0
+    READY_TIMEOUT = 180.0
+    PROCESS_TIMEOUT = 900.0
+    PROCESS_START_TIMEOUT = 5.0
+    POLL_DELAY_MIN = 0.25
+    POLL_DELAY_MAX = 2.0
 
     def __init__(self):
         """
@@ -34,6 +41,7 @@ class Ci:
         self.logger = logging.getLogger(self.__class__.__name__)
         self.command_url = None
         self.health_url = None
+        self.cleepapi = None
 
     def mod_check_package(self, package_path):
         """
@@ -64,7 +72,7 @@ class Ci:
         if not re.match("\d+\.\d+\.\d+", module_version):
             raise Exception("Invalid package filename")
         console = Console()
-        resp = console.command('file --keep-going --mime-type "%s"' % package_path)
+        resp = console.command('file --keep-going --mime-type "%s"' % package_path, 30)
         if resp["returncode"] != 0:
             raise Exception("Unable to check file validity")
         filetype = resp["stdout"][0].split(": ")[1].strip()
@@ -158,11 +166,7 @@ class Ci:
         try:
             # start cleep (non blocking)
             self.logger.info("  Starting Cleep...")
-            cleep_proc = subprocess.Popen(
-                ["cleep", "--noro"], stdout=subprocess.PIPE, stderr=subprocess.PIPE
-            )
-            time.sleep(15)
-            self._bind_rpc()
+            cleep_proc = self.__start_cleep()
 
             # make sure to have latest modules.json version
             self.logger.info("  Refreshing markets...")
@@ -199,11 +203,8 @@ class Ci:
                 self.__wait_for_cleep_process("update")
                 self.logger.info("  Restarting Cleep...")
                 cleep_proc.kill()
-                cleep_proc = subprocess.Popen(
-                    ["cleep", "--noro"], stdout=subprocess.PIPE, stderr=subprocess.PIPE
-                )
-                time.sleep(15)
-                self._bind_rpc()
+                cleep_proc.wait()
+                cleep_proc = self.__start_cleep()
 
             # install module in cleep (it will also install deps)
             self.logger.info('  Installing "%s" application in Cleep' % module_name)
@@ -230,11 +231,8 @@ class Ci:
             # restart cleep
             self.logger.info("  Restarting Cleep...")
             cleep_proc.kill()
-            cleep_proc = subprocess.Popen(
-                ["cleep", "--noro"], stdout=subprocess.PIPE, stderr=subprocess.PIPE
-            )
-            time.sleep(15)
-            self._bind_rpc()
+            cleep_proc.wait()
+            cleep_proc = self.__start_cleep()
 
             # check module is installed and running
             self.logger.info("  Checking application is installed...")
@@ -277,27 +275,111 @@ class Ci:
         Detect Cleep RPC endpoint (HTTPS first, then HTTP)
         """
         base = resolve_rpc_url()
-        self.command_url = urllib.parse.urljoin(base + "/", "command")
+        self.cleepapi = CleepApi(base)
+        self.command_url = self.cleepapi.command_url
         self.health_url = urllib.parse.urljoin(base + "/", "health")
 
     def _rpc_post(self, payload):
         """
-        POST JSON to Cleep /command (self-signed TLS accepted).
+        POST JSON to Cleep /command using shared keep-alive session (self-signed TLS accepted).
+        Read timeout follows command timeout plus a margin for Cleep to answer.
         """
-        return requests.post(self.command_url, json=payload, verify=False)
+        timeout = payload.get("timeout", self.RPC_TIMEOUT) + self.RPC_TIMEOUT_MARGIN
+        return self.cleepapi.request("POST", self.command_url, payload, timeout=timeout)
 
     def _rpc_get(self, url):
         """
-        GET Cleep RPC url (self-signed TLS accepted).
+        GET Cleep RPC url using shared keep-alive session (self-signed TLS accepted).
+        """
+        return self.cleepapi.request("GET", url, timeout=self.RPC_TIMEOUT)
+
+    def __start_cleep(self):
+        """
+        Start Cleep and wait for it to be ready
+
+        Returns:
+            Popen: Cleep process
+
+        Raises:
+            Exception if Cleep is not ready before READY_TIMEOUT
+        """
+        # output is not read, do not let it fill pipes buffer
+        cleep_proc = subprocess.Popen(
+            ["cleep", "--noro"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            self.__wait_for_cleep_ready(cleep_proc)
+        except Exception:
+            cleep_proc.kill()
+            raise
+        return cleep_proc
+
+    def __wait_for_cleep_ready(self, cleep_proc):
+        """
+        Wait for Cleep to be ready, polling /health endpoint with exponential backoff.
+        Cleep is ready as soon as it answers (any HTTP status), applications health is checked later
+
+        Args:
+            cleep_proc (Popen): Cleep process
+
+        Raises:
+            Exception if Cleep stopped or is not ready before READY_TIMEOUT
         """
-        return requests.get(url, verify=False)
+        start = time.monotonic()
+        deadline = start + self.READY_TIMEOUT
+        delay = self.POLL_DELAY_MIN
+        last_error = None
+        while True:
+            if cleep_proc.poll() is not None:
+                raise Exception(
+                    "Cleep stopped during startup (returncode=%s)" % cleep_proc.returncode
+                )
+
+            try:
+                self._bind_rpc()
+                # probe without session retries to follow polling delay
+                resp = requests.get(self.health_url, timeout=self.POLL_DELAY_MAX, verify=False)
+                self.logger.debug(
+                    "Cleep ready after %.1f seconds (health status %s)",
+                    time.monotonic() - start,
+                    resp.status_code,
+                )
+                return
+            except requests.exceptions.ConnectionError as error:
+                # Cleep not listening yet, or on another url than cached one
+                invalidate_rpc_url()
+                last_error = error
+            except Exception as error:
+                last_error = error
+
+            if time.monotonic() + delay > deadline:
+                raise Exception(
+                    "Cleep not ready after %s seconds: %s" % (self.READY_TIMEOUT, last_error)
+                )
+            time.sleep(delay)
+            delay = min(delay * 2, self.POLL_DELAY_MAX)
 
     def __wait_for_cleep_process(self, module_name):
         """
-        Wait for end of current Cleep process (install, update...)
+        Wait for end of current Cleep process (install, update...), polling with exponential backoff.
+        Process is considered terminated once it was seen processing, or after PROCESS_START_TIMEOUT
+        if it was never seen processing (very short process)
+
+        Raises:
+            Exception if process failed or is not terminated before PROCESS_TIMEOUT
         """
+        start = time.monotonic()
+        deadline = start + self.PROCESS_TIMEOUT
+        delay = self.POLL_DELAY_MIN
+        started = False
         while True:
-            time.sleep(1.0)
+            if time.monotonic() + delay > deadline:
+                raise Exception(
+                    'Application "%s" process not terminated after %s seconds'
+                    % (module_name, self.PROCESS_TIMEOUT)
+                )
+            time.sleep(delay)
+            delay = min(delay * 2, self.POLL_DELAY_MAX)
             resp = self._rpc_post(
                 {
                     "command": "get_modules_updates",
@@ -315,12 +397,17 @@ class Ci:
                 raise Exception(
                     'No "%s" application info in updates data' % module_name
                 )
-            if module_updates["processing"] == False:
-                if module_updates["update"]["failed"]:
-                    raise Exception(
-                        'Application "%s" installation failed' % module_name
-                    )
-                break
+            if module_updates["processing"]:
+                started = True
+                continue
+            if not started and time.monotonic() - start < self.PROCESS_START_TIMEOUT:
+                self.logger.debug("Application process not started yet")
+                continue
+            if module_updates["update"]["failed"]:
+                raise Exception(
+                    'Application "%s" installation failed' % module_name
+                )
+            break
 
     def mod_extract_sources(self, package_path, package_infos):
         """
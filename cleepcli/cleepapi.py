@@ -8,7 +8,12 @@ from . import config
 from .console import Console
 import requests
 import json
+import time
 import urllib.parse
+from threading import Lock
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 requests.packages.urllib3.disable_warnings()
 
@@ -18,18 +23,161 @@ DEFAULT_RPC_URLS = (
     'http://127.0.0.1:80',
 )
 
+# (connect, read) timeouts in seconds
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 30.0
 
-def resolve_rpc_url(urls=None, timeout=3.0):
+# connection errors are retried for all methods (request not sent yet), read errors and
+# temporary unavailability (Cleep restarting) only for idempotent requests
+RETRY_TOTAL = 3
+RETRY_BACKOFF_FACTOR = 0.5
+RETRY_STATUS = (502, 503, 504)
+POOL_SIZE = 4
+
+# resolved rpc url cache
+RPC_URL_CACHE_FILENAME = 'rpc_url.json'
+RPC_URL_CACHE_TTL = 600.0  # seconds
+
+_session = None
+_session_lock = Lock()
+_rpc_urls = {}
+_rpc_urls_lock = Lock()
+
+
+def get_session():
+    """
+    Return http session shared by all Cleep RPC calls
+
+    Session keeps connections alive so TCP connection and TLS handshake with Cleep are done once
+    and reused by next requests. Self-signed certificates are accepted.
+
+    Returns:
+        requests.Session: shared session
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=RETRY_TOTAL,
+                connect=RETRY_TOTAL,
+                read=RETRY_TOTAL,
+                status=RETRY_TOTAL,
+                backoff_factor=RETRY_BACKOFF_FACTOR,
+                status_forcelist=RETRY_STATUS,
+                allowed_methods=['GET', 'HEAD'],
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+            session = requests.Session()
+            session.verify = False
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+        return _session
+
+
+def get_rpc_url_candidates():
+    """
+    Return Cleep RPC base url candidates: url configured in Cleep config file (if any) followed by
+    default urls
+
+    Returns:
+        tuple: candidate base urls
+    """
+    # imported here to avoid loading tools dependencies when url is already cached
+    from .tools import get_cleep_url
+
+    candidates = []
+    try:
+        configured = get_cleep_url().replace('://0.0.0.0:', '://127.0.0.1:')
+        candidates.append(configured)
+    except Exception:
+        # no Cleep config file
+        pass
+    candidates.extend([url for url in DEFAULT_RPC_URLS if url not in candidates])
+    return tuple(candidates)
+
+
+def _probe_rpc_url(base, timeout):
+    """
+    Probe specified Cleep RPC base url
+
+    Args:
+        base (string): candidate base url
+        timeout (float): probe timeout in seconds
+
+    Returns:
+        string: base url (no trailing slash)
+
+    Raises:
+        requests.exceptions.RequestException: if candidate is not reachable
+    """
+    health_url = urllib.parse.urljoin(base.rstrip('/') + '/', 'health')
+    logging.getLogger('CleepApi').debug('Probing Cleep RPC %s', health_url)
+    # shared session retries are not wanted here: unreachable candidate must fail fast
+    requests.get(health_url, timeout=timeout, verify=False)
+    return base.rstrip('/')
+
+
+def _load_rpc_url(candidates=None, check=True):
+    """
+    Load resolved url from disk cache
+
+    Args:
+        candidates (tuple): candidate base urls (None for default candidates)
+        check (bool): return cached url only if it was resolved with the same candidates within ttl
+
+    Returns:
+        string: cached url or None if no valid cached url
+    """
+    try:
+        with open(os.path.join(config.CACHE_DIR, RPC_URL_CACHE_FILENAME)) as fdesc:
+            cached = json.load(fdesc)
+        if not check:
+            return cached['url']
+        if cached['candidates'] == (list(candidates) if candidates else None) and time.time() - cached['time'] < RPC_URL_CACHE_TTL:
+            return cached['url']
+    except Exception:
+        # no cache or invalid cache
+        pass
+    return None
+
+
+def _save_rpc_url(candidates, url):
+    """
+    Save resolved url to disk cache
+
+    Args:
+        candidates (tuple): candidate base urls (None for default candidates)
+        url (string): resolved url
+    """
+    try:
+        os.makedirs(config.CACHE_DIR, exist_ok=True)
+        cache_path = os.path.join(config.CACHE_DIR, RPC_URL_CACHE_FILENAME)
+        tmp_path = '%s.%s.tmp' % (cache_path, os.getpid())
+        with open(tmp_path, 'w') as fdesc:
+            json.dump({'candidates': list(candidates) if candidates else None, 'url': url, 'time': time.time()}, fdesc)
+        os.replace(tmp_path, cache_path)
+    except OSError as error:
+        logging.getLogger('CleepApi').debug('Unable to save Cleep RPC url cache: %s', error)
+
+
+def resolve_rpc_url(urls=None, timeout=3.0, disk_cache=True):
     """
     Return the first reachable Cleep RPC base URL.
 
-    Tries HTTPS first (Cleep default), then HTTP. Self-signed certificates
-    are accepted. A candidate is considered reachable as soon as a TCP/TLS
-    session is established (any HTTP status).
+    Candidates are probed concurrently but priority order is kept: a candidate wins only if all previous
+    ones failed. Self-signed certificates are accepted. A candidate is considered reachable as soon as a
+    TCP/TLS session is established (any HTTP status).
+
+    Resolved url is cached for process lifetime and on disk for RPC_URL_CACHE_TTL seconds. Cache is
+    invalidated by invalidate_rpc_url (called on connection failure). Default candidates are only built
+    (Cleep config file read) when no url is cached.
 
     Args:
-        urls (tuple): candidate base URLs
-        timeout (float): per-candidate timeout in seconds
+        urls (tuple): candidate base URLs (default configured url and DEFAULT_RPC_URLS)
+        timeout (float): probe timeout in seconds
+        disk_cache (bool): use disk cache
 
     Returns:
         str: reachable base URL (no trailing slash)
@@ -38,20 +186,63 @@ def resolve_rpc_url(urls=None, timeout=3.0):
         Exception: if none of the candidates respond
     """
     logger = logging.getLogger('CleepApi')
-    candidates = urls or DEFAULT_RPC_URLS
-    last_error = None
-    for base in candidates:
-        health_url = urllib.parse.urljoin(base.rstrip('/') + '/', 'health')
+    # default candidates are cached with None key
+    key = tuple(urls) if urls else None
+
+    with _rpc_urls_lock:
+        url = _rpc_urls.get(key)
+        if url is None and disk_cache:
+            url = _load_rpc_url(key)
+            if url:
+                logger.debug('Using cached Cleep RPC %s', url)
+                _rpc_urls[key] = url
+        if url:
+            return url
+
+        start = time.time()
+        candidates = key or get_rpc_url_candidates()
+        executor = ThreadPoolExecutor(max_workers=len(candidates))
+        futures = [executor.submit(_probe_rpc_url, base, timeout) for base in candidates]
+        last_error = None
         try:
-            logger.debug('Probing Cleep RPC %s', health_url)
-            requests.get(health_url, timeout=timeout, verify=False)
-            logger.info('Using Cleep RPC %s', base)
-            return base.rstrip('/')
-        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout, requests.exceptions.SSLError) as error:
-            logger.debug('Cleep RPC not reachable at %s: %s', base, error)
-            last_error = error
+            # results are read in priority order
+            for base, future in zip(candidates, futures):
+                try:
+                    url = future.result()
+                    break
+                except Exception as error:
+                    logger.debug('Cleep RPC not reachable at %s: %s', base, error)
+                    last_error = error
+        finally:
+            # pending probes end by themselves within timeout
+            executor.shutdown(wait=False)
+
+        if not url:
+            raise Exception('Unable to reach Cleep RPC (tried %s): %s' % (', '.join(candidates), last_error))
+
+        logger.info('Using Cleep RPC %s (resolved in %.2f seconds)', url, time.time() - start)
+        _rpc_urls[key] = url
+        if disk_cache:
+            _save_rpc_url(key, url)
+        return url
+
+
+def invalidate_rpc_url(url=None):
+    """
+    Invalidate resolved Cleep RPC url (process and disk caches)
 
-    raise Exception('Unable to reach Cleep RPC (tried %s): %s' % (', '.join(candidates), last_error))
+    Args:
+        url (string): invalidate only if cached url is this one (all urls if None)
+    """
+    with _rpc_urls_lock:
+        for key, cached_url in list(_rpc_urls.items()):
+            if url is None or cached_url == url.rstrip('/'):
+                del _rpc_urls[key]
+        if url is None or _load_rpc_url(check=False) == url.rstrip('/'):
+            try:
+                os.remove(os.path.join(config.CACHE_DIR, RPC_URL_CACHE_FILENAME))
+            except OSError:
+                pass
 
 
 class CleepApi():
@@ -59,8 +250,17 @@ class CleepApi():
     Cleep api helper
     """
 
-    def __init__(self, rpc_url):
+    def __init__(self, rpc_url, timeout=None):
+        """
+        Constructor
+
+        Args:
+            rpc_url (string): Cleep RPC base url (resolved if None)
+            timeout (float): default read timeout in seconds (default READ_TIMEOUT)
+        """
         self.logger = logging.getLogger(self.__class__.__name__)
+        self.session = get_session()
+        self.timeout = timeout or READ_TIMEOUT
 
         if not rpc_url:
             try:
@@ -69,9 +269,12 @@ class CleepApi():
                 rpc_url = DEFAULT_RPC_URLS[0]
         self.logger.debug('RPC url: %s', rpc_url)
 
+        self.rpc_url = rpc_url
         self.command_url = urllib.parse.urljoin(rpc_url, "/command")
         self.get_doc_url = urllib.parse.urljoin(rpc_url, "/doc/")
         self.check_doc_url = urllib.parse.urljoin(rpc_url, "/doc/check/")
+        # developer application reload_module command support (None until probed)
+        self.__reload_supported = None
 
     def restart_backend(self):
         """
@@ -81,7 +284,7 @@ class CleepApi():
 
         cmd = '/bin/systemctl restart cleep'
         c = Console()
-        resp = c.command(cmd)
+        resp = c.command(cmd, 60)
         self.logger.debug('Systemctl resp: %s' % resp)
         if resp['error'] or resp['killed']:
             self.logger.error('Error restarting cleep backend')
@@ -89,27 +292,79 @@ class CleepApi():
 
         return True
 
-    def restart_frontend(self):
+    def restart_frontend(self, timeout=None):
         """
         Send command to restart frontend
+
+        Args:
+            timeout (float): read timeout in seconds (default instance timeout)
         """
         self.logger.info('Restarting frontend')
         data = {'to':'developer', 'command':'restart_frontend'}
-        self.__post(self.command_url, data)
+        self.__post(self.command_url, data, timeout)
+
+    def reload_module(self, module_name, timeout=None):
+        """
+        Send command to reload specified module backend without restarting Cleep
+        It needs a developer application version that supports it
+
+        Args:
+            module_name (str): module name
+            timeout (float): read timeout in seconds (default instance timeout)
+
+        Returns:
+            bool: True if module reloaded, False if reload failed or is not supported
+        """
+        if not self.__is_reload_supported():
+            self.logger.debug('Module reload not supported by installed developer application')
+            return False
+
+        self.logger.info('Reloading module "%s"', module_name)
+        data = {'to':'developer', 'command':'reload_module', 'params': {'module_name': module_name}}
+        resp = self.__post(self.command_url, data, timeout)
+        if not resp:
+            return False
 
-    def get_documentation(self, module_name):
+        (status_code, resp_data) = resp
+        if status_code != 200 or not isinstance(resp_data, dict) or resp_data.get('error'):
+            self.logger.debug('Module "%s" reload failed: %s', module_name, resp_data)
+            return False
+        return True
+
+    def __is_reload_supported(self):
+        """
+        Check once if developer application supports reload_module command
+
+        Returns:
+            bool: True if supported or support could not be checked (Cleep not reachable)
+        """
+        if self.__reload_supported is not None:
+            return self.__reload_supported
+
+        data = {'to':'inventory', 'command':'get_module_commands', 'params': {'module_name': 'developer'}}
+        resp = self.__post(self.command_url, data)
+        if not resp or resp[0] != 200 or not isinstance(resp[1], dict) or resp[1].get('error'):
+            # unable to check, try command and do not cache answer
+            return True
+
+        self.__reload_supported = 'reload_module' in (resp[1].get('data') or [])
+        self.logger.debug('Developer application reload_module support: %s', self.__reload_supported)
+        return self.__reload_supported
+
+    def get_documentation(self, module_name, timeout=None):
         """
         Call endpoint to get documentation for specified application
 
         Args:
             module_name (str): module name
+            timeout (float): read timeout in seconds (default instance timeout)
 
         Returns:
             dict: cleep command response
         """
         url = urllib.parse.urljoin(self.get_doc_url, module_name)
 
-        (status_code, resp) = self.__get(url)
+        (status_code, resp) = self.__get(url, timeout)
 
         if status_code != 200:
             raise Exception("Unable to call cleep %s endpoint" % url)
@@ -117,31 +372,61 @@ class CleepApi():
             raise Exception(resp.get("message", "No error message"))
         return resp.get("data")
 
-    def check_documentation(self, module_name):
+    def check_documentation(self, module_name, timeout=None):
         """
         Call endpoint to check documentation for specified application
 
         Args:
             module_name (str): module name
+            timeout (float): read timeout in seconds (default instance timeout)
 
         Returns:
             dict: cleep command response
         """
         url = urllib.parse.urljoin(self.check_doc_url, module_name)
 
-        (status_code, resp) = self.__get(url)
+        (status_code, resp) = self.__get(url, timeout)
 
         if status_code != 200:
             raise Exception("Unable to call cleep %s endpoint", url)
         return resp
 
-    def __post(self, url, data):
+    def request(self, method, url, data=None, timeout=None):
+        """
+        Send request to Cleep using shared session
+
+        Args:
+            method (string): http method (GET, POST...)
+            url (string): request url
+            data (dict): json data to send
+            timeout (float): read timeout in seconds (default instance timeout)
+
+        Returns:
+            requests.Response: response
+
+        Raises:
+            requests.exceptions.RequestException: if request failed (after retries)
+        """
+        try:
+            return self.session.request(
+                method,
+                url,
+                json=data,
+                timeout=(CONNECT_TIMEOUT, timeout or self.timeout),
+            )
+        except requests.exceptions.ConnectionError:
+            # Cleep may now listen on another url
+            invalidate_rpc_url(self.rpc_url)
+            raise
+
+    def __post(self, url, data, timeout=None):
         """
         Post data to specified url
 
         Args:
             url (string): request url
             data (dict): request data
+            timeout (float): read timeout in seconds
 
         Returns:
             tuple: post response::
@@ -152,7 +437,7 @@ class CleepApi():
         """
         try:
             self.logger.debug("POST url: %s", url)
-            resp = requests.post(url, json=data, verify=False)
+            resp = self.request('POST', url, data, timeout)
             resp_data = resp.json()
             self.logger.debug('Response[%s]: %s', resp.status_code, resp_data)
             return (resp.status_code, resp_data)
@@ -162,12 +447,13 @@ class CleepApi():
             else:
                 self.logger.error('Error occured while requesting POST "%s": %s' % (url, str(e)))
 
-    def __get(self, url):
+    def __get(self, url, timeout=None):
         """
         Get data to specified url
 
         Args:
             url (string): request url
+            timeout (float): read timeout in seconds
 
         Returns:
             tuple: get response::
@@ -178,7 +464,7 @@ class CleepApi():
         """
         try:
             self.logger.debug("GET url: %s", url)
-            resp = requests.get(url, verify=False)
+            resp = self.request('GET', url, timeout=timeout)
             resp_data = resp.json()
             self.logger.debug('Response[%s]: %s', resp.status_code, resp_data)
             return (resp.status_code, resp_data)
@@ -2,21 +2,73 @@
 # -*- coding: utf-8 -*-
 
 import os
-from importlib.machinery import SourceFileLoader
-try:
-    import cleep
-except:
-    class cleep:
-        # fallback to supposed cleep installation path
-        __path__ = ['/usr/lib/python3/dist-packages/cleep']
+import re
+
+# fallback to supposed cleep installation path
+CORE_DST_FALLBACK = '/usr/lib/python3/dist-packages/cleep'
+VERSION_PATTERN = re.compile(r'^__version__\s*=\s*[\'"]([^\'"]+)[\'"]', re.MULTILINE)
+
+# values computed on first access (see __getattr__)
+LAZY_VALUES = ['CORE_DST', 'CORE_VERSION']
+_core_versions = {}
+
+def get_core_dst():
+    """
+    Return installed cleep package path without importing it
+
+    Returns:
+        string: cleep package path
+    """
+    from importlib.util import find_spec
+    try:
+        spec = find_spec('cleep')
+    except Exception:
+        spec = None
+    if spec and spec.submodule_search_locations:
+        return list(spec.submodule_search_locations)[0]
+    return CORE_DST_FALLBACK
 
 def get_core_version_from_sources(repo_dir):
+    """
+    Return core version parsed from sources (cleep/__init__.py is not executed)
+    Result is cached until file is modified
+
+    Args:
+        repo_dir (string): repository directory
+
+    Returns:
+        string: core version or None if not found
+    """
+    path = os.path.join(repo_dir, 'cleep', '__init__.py')
     try:
-        cleep_sources = SourceFileLoader("cleep_sources", os.path.join(repo_dir, 'cleep', '__init__.py')).load_module()
-        return cleep_sources.__version__
-    except:
+        mtime = os.stat(path).st_mtime_ns
+        cached = _core_versions.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        with open(path) as fdesc:
+            match = VERSION_PATTERN.search(fdesc.read())
+        version = match.group(1) if match else None
+        _core_versions[path] = (mtime, version)
+        return version
+    except OSError:
         return None
 
+def __getattr__(name):
+    """
+    Compute lazy config values on first access (PEP 562)
+    """
+    if name == 'CORE_DST':
+        # memoized: cleep installation does not move during process lifetime
+        globals()['CORE_DST'] = get_core_dst()
+        return globals()['CORE_DST']
+    if name == 'CORE_VERSION':
+        # not memoized: sources may change during process lifetime (watch)
+        return get_core_version_from_sources(REPO_DIR)
+    raise AttributeError('module %r has no attribute %r' % (__name__, name))
+
+def __dir__():
+    return sorted(list(globals().keys()) + LAZY_VALUES)
+
 MODULES_REPO_URL = {
     'system': 'https://github.com/CleepDevice/cleepapp-system.git',
     'parameters': 'https://github.com/CleepDevice/cleepapp-parameters.git',
@@ -36,7 +88,6 @@ REPO_URL = 'https://github.com/CleepDevice/cleep.git'
 REPO_DIR = os.environ.get('REPO_DIR', '/root/cleep-dev')
 
 CORE_SRC = '%s/cleep' % REPO_DIR
-CORE_DST = cleep.__path__[0] if cleep.__path__ else None
 
 HTML_SRC = '%s/html' % REPO_DIR
 HTML_DST = '/opt/cleep/html'
@@ -55,6 +106,8 @@ MEDIA_DST = '/opt/cleep'
 DOCS_AUTHOR = 'CleepDevice'
 DOCS_PROJECT_NAME = 'Cleep core'
 
-CORE_VERSION = get_core_version_from_sources(REPO_DIR)
-
 CONFIG_DIR = '/etc/cleep'
+
+CACHE_DIR = os.environ.get('CLEEPCLI_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'cleep-cli'))
+
+DAEMON_SOCKET = os.environ.get('CLEEPCLI_DAEMON_SOCKET', os.path.join(CACHE_DIR, 'daemon.sock'))
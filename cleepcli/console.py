@@ -3,17 +3,16 @@
 
 import sys
 import subprocess
+import selectors
 import time
 from threading import Timer, Thread
-try: # pragma: no cover
-    from Queue import Queue, Empty
-except ImportError: # pragma: no cover
-    from queue import Queue, Empty  # python 3.x
 import os
 import signal
 import logging
 import re
 
+ON_POSIX = 'posix' in sys.builtin_module_names
+
 class EndlessConsole(Thread):
     """
     Helper class to execute long command line (system update...)
@@ -25,20 +24,25 @@ class EndlessConsole(Thread):
         c = EndlessConsole(mycmd, myclb, myendclb)
         c.join()
 
-    Notes:
-        Subprocess output async reading copied from https://stackoverflow.com/a/4896288
+    Outputs are read with a selector and sent to callback as soon as lines are available. In bulk
+    mode the callback receives all lines read at once instead of being called for each line.
     """
 
-    def __init__(self, command, callback, callback_end=None):
+    READ_SIZE = 65536
+    KILL_CHECK_INTERVAL = 0.1 # seconds
+
+    def __init__(self, command, callback, callback_end=None, bulk=False):
         """
         Constructor
 
         Args:
             command (string): command to execute
             callback (function): callback when message is received (the function will be called with 2
-                                 arguments: stdout (string) and stderr (string))
+                                 arguments: stdout (string) and stderr (string). In bulk mode arguments are
+                                 stdout lines (list) and stderr lines (list))
             callback_end (function): callback when process is terminated (the function will be called
                                      with 2 arguments: return code (string) and killed (bool))
+            bulk (bool): send lines to callback by batch instead of line by line
         """
         Thread.__init__(self, daemon=True, name='endlessconsole-%s' % getattr(callback, '__name__', 'unamed'))
 
@@ -46,15 +50,12 @@ class EndlessConsole(Thread):
         self.command = command
         self.callback = callback
         self.callback_end = callback_end
+        self.bulk = bulk
         self.logger = logging.getLogger(self.__class__.__name__)
         # self.logger.setLevel(logging.DEBUG)
         self.running = True
         self.killed = False
         self.__start_time = 0
-        self.__stdout_queue = Queue()
-        self.__stderr_queue = Queue()
-        self.__stdout_thread = None
-        self.__stderr_thread = None
 
     def __del__(self):
         """
@@ -62,16 +63,6 @@ class EndlessConsole(Thread):
         """
         self.__stop()
 
-    def __enqueue_output(self, output, queue):
-        for line in iter(output.readline, b''):
-            if not self.running:
-                break
-            queue.put(line.decode('utf-8').rstrip())
-        try:
-            output.close()
-        except Exception: # pragma: no cover
-            pass
-
     def get_start_time(self):
         """
         Return process start time
@@ -101,41 +92,48 @@ class EndlessConsole(Thread):
         self.killed = True
         self.__stop()
 
-    def __send_stds(self):
+    def __split_lines(self, buffer, data):
         """
-        Read queues and send outputs if available
+        Split read data into complete lines
+
+        Args:
+            buffer (bytes): incomplete line kept from previous read
+            data (bytes): read data (empty bytes on EOF)
 
         Returns:
-            True if something sent, False otherwise
+            tuple: complete lines and new buffer::
+
+                (lines (list), buffer (bytes))
+
         """
-        if not self.callback:
-            return False
+        if not data:
+            # EOF, flush incomplete line
+            return ([buffer.decode('utf-8').rstrip()] if buffer else [], b'')
 
-        stdout = None
-        stderr = None
+        lines = (buffer + data).split(b'\n')
+        return ([line.decode('utf-8').rstrip() for line in lines[:-1]], lines[-1])
 
-        try:
-            stdout = self.__stdout_queue.get_nowait()
-        except Empty:
-            pass
-        except Exception: # pragma: no cover
-            self.logger.exception('Error getting stdout queue')
+    def __send_stds(self, outputs):
+        """
+        Send outputs to callback
 
-        try:
-            stderr = self.__stderr_queue.get_nowait()
-        except Empty:
-            pass
-        except Exception: # pragma: no cover
-            self.logger.exception('Error getting stderr queue')
+        Args:
+            outputs (list): lines in read order [(stdout line, None) or (None, stderr line), ...]
+        """
+        if not self.callback or not outputs:
+            return
 
-        if stdout is not None or stderr is not None:
-            try:
+        try:
+            if self.bulk:
+                self.callback(
+                    [stdout for stdout, _ in outputs if stdout is not None],
+                    [stderr for _, stderr in outputs if stderr is not None],
+                )
+                return
+            for stdout, stderr in outputs:
                 self.callback(stdout, stderr)
-            except Exception:
-                self.logger.exception('Exception occured during EndlessCommand callback:')
-            return True
-
-        return False
+        except Exception:
+            self.logger.exception('Exception occured during EndlessCommand callback:')
 
     def run(self):
         """
@@ -156,50 +154,26 @@ class EndlessConsole(Thread):
         pid = proc.pid
         self.logger.trace('PID=%d' % pid)
 
-        if self.callback:
-            # async stdout reading
-            self.__stdout_thread = Thread(
-                target=self.__enqueue_output,
-                args=(proc.stdout, self.__stdout_queue),
-                daemon=True,
-                name='endlessconsole-stdout'
-            )
-            self.__stdout_thread.start()
-
-            # async stderr reading
-            self.__stderr_thread = Thread(
-                target=self.__enqueue_output,
-                args=(proc.stderr, self.__stderr_queue),
-                daemon=True,
-                name='endlessconsole-stderr'
-            )
-            self.__stderr_thread.start()
-
-        # wait for end of command line
-        while self.running:
-            # check process status
-            proc.poll()
-
-            # read outputs and trigger callback
-            self.__send_stds()
-
-            # check end of command
-            if proc.returncode is not None:
-                return_code = proc.returncode
-                self.logger.debug('Process is terminated with return code %s' % proc.returncode)
-                break
-
-            # pause
-            time.sleep(0.25)
-
-        # purge queues
-        self.logger.trace('Purging outputs...')
-        count = 0
-        while self.__send_stds() or count <= 5:
-            self.logger.trace(' purging...')
-            count += 1
-            time.sleep(0.05)
-        self.logger.trace('Purge completed')
+        # read outputs as soon as available until both pipes are closed
+        buffers = {proc.stdout: b'', proc.stderr: b''}
+        with selectors.DefaultSelector() as selector:
+            selector.register(proc.stdout, selectors.EVENT_READ)
+            selector.register(proc.stderr, selectors.EVENT_READ)
+            while self.running and selector.get_map():
+                outputs = []
+                for key, _ in selector.select(self.KILL_CHECK_INTERVAL):
+                    data = os.read(key.fd, self.READ_SIZE)
+                    if not data:
+                        selector.unregister(key.fileobj)
+                    (lines, buffers[key.fileobj]) = self.__split_lines(buffers[key.fileobj], data)
+                    is_stdout = key.fileobj is proc.stdout
+                    outputs.extend([(line, None) if is_stdout else (None, line) for line in lines])
+                self.__send_stds(outputs)
+
+        # check end of command
+        if not self.killed:
+            return_code = proc.wait()
+            self.logger.debug('Process is terminated with return code %s' % return_code)
 
         # make sure all stds are closed
         try:
@@ -218,6 +192,7 @@ class EndlessConsole(Thread):
                     os.killpg(os.getpgid(pid), signal.SIGKILL)
                 else: # pragma: no cover
                     proc.kill()
+                proc.wait()
             except Exception: # pragma: no cover
                 pass
 
@@ -326,49 +301,59 @@ class Console():
         )
         pid = proc.pid
 
-        # wait for end of command line
-        done = False
-        start = time.time()
+        # read stds as soon as data is available (avoid deadlocks) until both pipes are closed
+        deadline = time.monotonic() + timeout
         killed = False
         return_code = None
-        while not done:
-            # read stds to avoid deadlocks
-            (stdout, stderr) = proc.communicate()
-            if stdout:
-                result['stdout'] += self.__process_lines(stdout.split(b'\n'))
-            if stderr:
-                result['stderr'] += self.__process_lines(stderr.split(b'\n'))
-
-            # check if command has finished
-            proc.poll()
-            if proc.returncode is not None:
-                # command terminated
-                self.logger.trace('Command terminated with returncode %s' % proc.returncode)
-                return_code = proc.returncode
+        outputs = {proc.stdout: [], proc.stderr: []}
+        with selectors.DefaultSelector() as selector:
+            selector.register(proc.stdout, selectors.EVENT_READ)
+            selector.register(proc.stderr, selectors.EVENT_READ)
+            while selector.get_map():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    killed = True
+                    break
+                for key, _ in selector.select(remaining):
+                    data = os.read(key.fd, 32768)
+                    if not data:
+                        # EOF
+                        selector.unregister(key.fileobj)
+                        continue
+                    outputs[key.fileobj].append(data)
+
+        # wait for process exit within remaining time
+        if not killed:
+            try:
+                return_code = proc.wait(timeout=max(deadline - time.monotonic(), 0))
+                self.logger.trace('Command terminated with returncode %s' % return_code)
                 self.last_return_code = return_code
-                done = True
-                break
+            except subprocess.TimeoutExpired:
+                killed = True
 
-            # check timeout
-            if time.time() > (start + timeout):
-                # timeout is over, kill command
+        if killed:
+            # timeout is over, kill command
+            try:
                 pgid = os.getpgid(pid)
                 self.logger.debug('Timeout over, kill command for PID=%s PGID=%s' % (pid, pgid))
-                try:
-                    if ON_POSIX:
-                        os.killpg(pgid, signal.SIGKILL)
-                    else: # pragma: no cover
-                        proc.kill()
-                except Exception: # pragma: no cover
-                    pass
-                killed = True
-                break
+                if ON_POSIX:
+                    os.killpg(pgid, signal.SIGKILL)
+                else: # pragma: no cover
+                    proc.kill()
+                proc.wait(timeout=1.0)
+            except Exception: # pragma: no cover
+                pass
 
-            # pause
-            time.sleep(0.125)
+        stdout = b''.join(outputs[proc.stdout])
+        if stdout:
+            result['stdout'] += self.__process_lines(stdout.split(b'\n'))
+        stderr = b''.join(outputs[proc.stderr])
+        if stderr:
+            result['stderr'] += self.__process_lines(stderr.split(b'\n'))
 
         # prepare result
         result['returncode'] = return_code
+        result['killed'] = killed
         if not killed:
             result['error'] = len(result['stderr']) > 0
         self.logger.trace('Result: %s' % result)
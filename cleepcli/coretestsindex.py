@@ -0,0 +1,290 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import ast
+import json
+import hashlib
+import logging
+from . import config
+
+class CoreTestsIndex():
+    """
+    Persistent index of core tests results. It stores for each core file a fingerprint of the file,
+    its test file and all core modules they import, with last test result. It allows running only
+    tests impacted by changes since last successful run.
+
+    It also keeps history of tests durations (not reset when index is invalidated) to schedule tests.
+    """
+
+    INDEX_VERSION = 1
+    INDEX_FILENAME = 'coretests.json'
+    # files and dirs (relative to core path) that invalidate the whole index when changed
+    GLOBAL_FILES = ['__init__.py']
+    GLOBAL_DIRS = ['libs/tests']
+
+    def __init__(self, core_path, index_path=None):
+        """
+        Constructor
+
+        Args:
+            core_path (string): core sources path
+            index_path (string): index file path (default in cleep-cli cache dir)
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.core_path = core_path
+        self.index_path = index_path or os.path.join(config.CACHE_DIR, self.INDEX_FILENAME)
+        self.__hashes = {}
+        self.__dependencies = {}
+        self.__index = self.__load()
+
+    def __load(self):
+        """
+        Load index from disk. Index is reset if global files changed
+
+        Returns:
+            dict: index content
+        """
+        global_fingerprint = self.__get_global_fingerprint()
+        index = None
+        try:
+            with open(self.index_path) as fdesc:
+                index = json.load(fdesc)
+        except FileNotFoundError:
+            pass
+        except Exception:
+            self.logger.warning('Core tests index "%s" is invalid and will be reset', self.index_path)
+
+        if not index or index.get('version') != self.INDEX_VERSION:
+            index = {'version': self.INDEX_VERSION, 'global': global_fingerprint, 'files': {}, 'durations': {}}
+        elif index.get('global') != global_fingerprint:
+            self.logger.info('Core shared files changed, all tests will be executed')
+            index['global'] = global_fingerprint
+            index['files'] = {}
+        index.setdefault('durations', {})
+
+        return index
+
+    def save(self):
+        """
+        Save index to disk
+        """
+        try:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            tmp_path = self.index_path + '.tmp'
+            with open(tmp_path, 'w') as fdesc:
+                json.dump(self.__index, fdesc)
+            os.replace(tmp_path, self.index_path)
+        except Exception:
+            self.logger.exception('Unable to save core tests index "%s"', self.index_path)
+
+    def __hash_file(self, filepath):
+        """
+        Return file content hash (memoized)
+
+        Args:
+            filepath (string): file path
+
+        Returns:
+            string: file hash or None if file does not exist
+        """
+        if filepath not in self.__hashes:
+            try:
+                with open(filepath, 'rb') as fdesc:
+                    self.__hashes[filepath] = hashlib.sha1(fdesc.read()).hexdigest()
+            except OSError:
+                self.__hashes[filepath] = None
+
+        return self.__hashes[filepath]
+
+    def __get_global_fingerprint(self):
+        """
+        Return fingerprint of core shared files
+
+        Returns:
+            string: fingerprint
+        """
+        filepaths = [os.path.join(self.core_path, filename) for filename in self.GLOBAL_FILES]
+        for global_dir in self.GLOBAL_DIRS:
+            for root, _, filenames in os.walk(os.path.join(self.core_path, global_dir)):
+                filepaths += [os.path.join(root, filename) for filename in filenames if filename.endswith('.py')]
+
+        return self.__hash_files(filepaths)
+
+    def __hash_files(self, filepaths):
+        """
+        Return hash of specified files content
+
+        Args:
+            filepaths (iterable): files paths
+
+        Returns:
+            string: hash
+        """
+        sha1 = hashlib.sha1()
+        for filepath in sorted(filepaths):
+            sha1.update(('%s:%s\n' % (filepath, self.__hash_file(filepath))).encode('utf-8'))
+
+        return sha1.hexdigest()
+
+    def __module_to_filepaths(self, module_name):
+        """
+        Convert core module name to core files that are executed when importing it
+
+        Args:
+            module_name (string): module name (cleep.libs.internals.task)
+
+        Returns:
+            list: list of files (packages __init__.py and module file). Empty list if not a core module
+        """
+        parts = module_name.split('.')
+        if parts[0] != 'cleep':
+            return []
+
+        filepaths = []
+        path = self.core_path
+        for part in parts[1:]:
+            init_path = os.path.join(path, '__init__.py')
+            if os.path.exists(init_path):
+                filepaths.append(init_path)
+            path = os.path.join(path, part)
+        if os.path.exists(path + '.py'):
+            filepaths.append(path + '.py')
+        elif os.path.exists(os.path.join(path, '__init__.py')):
+            filepaths.append(os.path.join(path, '__init__.py'))
+
+        return filepaths
+
+    def __filepath_to_package(self, filepath):
+        """
+        Return package name of specified core file
+
+        Args:
+            filepath (string): core file path
+
+        Returns:
+            list: package name parts
+        """
+        relative_path = os.path.relpath(os.path.dirname(filepath), self.core_path)
+        parts = ['cleep']
+        if relative_path != '.':
+            parts += relative_path.split(os.path.sep)
+
+        return parts
+
+    def __get_imports(self, filepath):
+        """
+        Return core files directly imported by specified file
+
+        Args:
+            filepath (string): python file path
+
+        Returns:
+            set: imported core files
+        """
+        try:
+            with open(filepath, 'rb') as fdesc:
+                tree = ast.parse(fdesc.read(), filepath)
+        except Exception:
+            self.logger.debug('Unable to parse "%s" imports', filepath)
+            return set()
+
+        module_names = []
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                module_names += [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom):
+                if node.level:
+                    package = self.__filepath_to_package(filepath)
+                    package = package[:len(package) - node.level + 1]
+                    base = '.'.join(package + ([node.module] if node.module else []))
+                else:
+                    base = node.module
+                module_names.append(base)
+                # imported names can be modules too
+                module_names += ['%s.%s' % (base, alias.name) for alias in node.names if alias.name != '*']
+
+        imports = set()
+        for module_name in module_names:
+            imports.update(self.__module_to_filepaths(module_name))
+
+        return imports
+
+    def __get_dependencies(self, filepaths):
+        """
+        Return specified files and all core files they import (recursively)
+
+        Args:
+            filepaths (list): python files paths
+
+        Returns:
+            set: files paths
+        """
+        dependencies = set()
+        to_process = list(filepaths)
+        while to_process:
+            filepath = to_process.pop()
+            if filepath in dependencies:
+                continue
+            dependencies.add(filepath)
+            if filepath not in self.__dependencies:
+                self.__dependencies[filepath] = self.__get_imports(filepath) if os.path.exists(filepath) else set()
+            to_process += list(self.__dependencies[filepath] - dependencies)
+
+        return dependencies
+
+    def get_fingerprint(self, filepath, test_filepath):
+        """
+        Return fingerprint of specified core file and its test file
+
+        Args:
+            filepath (string): core file path
+            test_filepath (string): test file path
+
+        Returns:
+            string: fingerprint
+        """
+        return self.__hash_files(self.__get_dependencies([filepath, test_filepath]))
+
+    def is_up_to_date(self, filepath, fingerprint):
+        """
+        Return True if specified file tests succeed with the same fingerprint during previous run
+
+        Args:
+            filepath (string): core file path
+            fingerprint (string): current file fingerprint
+
+        Returns:
+            bool: True if tests don't need to be executed again
+        """
+        entry = self.__index['files'].get(filepath)
+        return bool(entry and entry['success'] and entry['fingerprint'] == fingerprint)
+
+    def get_duration(self, filepath):
+        """
+        Return last known tests duration of specified file
+
+        Args:
+            filepath (string): core file path
+
+        Returns:
+            float: duration in seconds or None if unknown
+        """
+        return self.__index['durations'].get(filepath)
+
+    def update(self, filepath, fingerprint, success, duration=None):
+        """
+        Update file tests result
+
+        Args:
+            filepath (string): core file path
+            fingerprint (string): file fingerprint when tests were executed (None if not computed)
+            success (bool): True if tests succeed
+            duration (float): tests duration in seconds
+        """
+        self.__index['files'][filepath] = {
+            'fingerprint': fingerprint,
+            'success': success,
+        }
+        if duration is not None:
+            self.__index['durations'][filepath] = round(duration, 3)
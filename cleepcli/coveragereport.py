@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import io
+import json
+import logging
+import tempfile
+from contextlib import redirect_stderr
+import coverage
+from coverage.data import CoverageData
+from coverage.exceptions import NoDataError
+from coverage.results import Numbers
+
+class CoverageReport():
+    """
+    Aggregate and report coverage data using coverage.py api instead of coverage command line
+
+    Note:
+        Current working dir is never changed (commands can run concurrently or in daemon), so data and
+        config files are specified with absolute paths and reported files paths are relative to current
+        working dir.
+    """
+
+    def __init__(self, tests_path, data_file=None, quiet=True):
+        """
+        Constructor
+
+        Args:
+            tests_path (string): path where tests are executed (coverage working dir)
+            data_file (string): coverage data file path (default .coverage in tests path)
+            quiet (bool): display or not coverage.py warnings
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.tests_path = os.path.abspath(tests_path)
+        self.data_file = os.path.abspath(data_file or os.path.join(self.tests_path, '.coverage'))
+        self.quiet = quiet
+
+    def __get_coverage(self):
+        """
+        Return new coverage instance configured like coverage command line executed in tests path
+
+        Returns:
+            Coverage: coverage instance
+        """
+        config_file = os.path.join(self.tests_path, '.coveragerc')
+        return coverage.Coverage(
+            data_file=self.data_file,
+            config_file=config_file if os.path.exists(config_file) else False,
+        )
+
+    def __run(self, func, *args, **kwargs):
+        """
+        Run coverage function catching warnings it writes on stderr
+
+        Args:
+            func (function): function to run
+            args/kwargs: function arguments
+
+        Returns:
+            any: function result
+        """
+        stderr = io.StringIO()
+        try:
+            with redirect_stderr(stderr):
+                return func(*args, **kwargs)
+        finally:
+            if not self.quiet and stderr.getvalue():
+                self.logger.warning('Warning on stderr: %s', stderr.getvalue().strip())
+
+    def erase(self):
+        """
+        Erase coverage data file and parallel data files
+        """
+        CoverageData(basename=self.data_file).erase(parallel=True)
+
+    def combine(self, append=False):
+        """
+        Combine parallel data files into data file
+
+        Args:
+            append (bool): merge parallel data files with existing data file instead of replacing it
+
+        Returns:
+            bool: True if data combined, False if there was no data to combine
+        """
+        cov = self.__get_coverage()
+        if append:
+            cov.load()
+        try:
+            self.__run(cov.combine, data_paths=[os.path.dirname(self.data_file)])
+            cov.save()
+            return True
+        except NoDataError:
+            self.logger.debug('No coverage data to combine in "%s"', self.tests_path)
+            return False
+
+    def to_dict(self):
+        """
+        Return coverage results (same values as coverage report command)
+
+        Returns:
+            dict: coverage results::
+
+                {
+                    files (list): list of files::
+                        [
+                            {
+                                file (string): file path
+                                statements (int): number of statements
+                                coverage (int): coverage percentage (including branches if enabled)
+                            },
+                            ...
+                        ]
+                    score (float): total coverage score (/10)
+                }
+
+        """
+        cov = self.__get_coverage()
+        cov.load()
+        if not cov.get_data().measured_files():
+            return {'files': [], 'score': 0.0}
+
+        # json report provides statements and branches numbers of each file
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            json_path = os.path.join(tmp_dir, 'coverage.json')
+            self.__run(cov.json_report, outfile=json_path, ignore_errors=True)
+            with open(json_path) as fdesc:
+                json_report = json.load(fdesc)
+
+        files = []
+        total = Numbers(precision=0)
+        for filename, data in sorted(json_report['files'].items()):
+            summary = data['summary']
+            numbers = Numbers(
+                precision=0,
+                n_files=1,
+                n_statements=summary['num_statements'],
+                n_missing=summary['missing_lines'],
+                n_branches=summary.get('num_branches', 0),
+                n_partial_branches=summary.get('num_partial_branches', 0),
+                n_missing_branches=summary.get('missing_branches', 0),
+            )
+            total += numbers
+            files.append({
+                'file': os.path.abspath(filename),
+                'statements': numbers.n_statements,
+                'coverage': int(numbers.pc_covered_str),
+            })
+
+        return {
+            'files': files,
+            'score': int(total.pc_covered_str) / 10 if files else 0.0,
+        }
+
+    def report(self, missing=False):
+        """
+        Return coverage text report
+
+        Args:
+            missing (bool): display missing statements
+
+        Returns:
+            string: text report
+        """
+        output = io.StringIO()
+        cov = self.__get_coverage()
+        cov.load()
+        self.__run(cov.report, show_missing=missing, ignore_errors=True, file=output)
+
+        return output.getvalue()
+
+    def xml(self):
+        """
+        Write coverage xml report in tests path
+
+        Returns:
+            string: xml report path
+        """
+        xml_path = os.path.join(self.tests_path, 'coverage.xml')
+        cov = self.__get_coverage()
+        cov.load()
+        self.__run(cov.xml_report, outfile=xml_path, ignore_errors=True)
+
+        return 'Wrote XML report to %s' % xml_path
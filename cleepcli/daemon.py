@@ -0,0 +1,288 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import io
+import sys
+import json
+import time
+import socket
+import signal
+import logging
+import importlib
+import traceback
+import socketserver
+from . import config
+from .version import VERSION
+
+class ClientStream(io.TextIOBase):
+    """
+    Text stream that forwards written data to daemon client
+    """
+
+    encoding = 'utf-8'
+    errors = 'replace'
+
+    def __init__(self, wfile, name):
+        """
+        Constructor
+
+        Args:
+            wfile (file): client socket file
+            name (string): stream name (out or err)
+        """
+        io.TextIOBase.__init__(self)
+        self.wfile = wfile
+        self.name = name
+
+    def writable(self):
+        return True
+
+    def isatty(self):
+        return False
+
+    def write(self, data):
+        if isinstance(data, bytes):
+            data = data.decode(self.encoding, self.errors)
+        if data:
+            try:
+                self.wfile.write((json.dumps({self.name: data}) + '\n').encode('utf-8'))
+                self.wfile.flush()
+            except OSError:
+                # client disconnected, command output is lost
+                pass
+        return len(data)
+
+class CliDaemon():
+    """
+    Cleep-cli daemon
+
+    Executes commands forwarded by cleep-cli thin clients (see forward_command) through a unix socket. Loaded
+    modules, http session, resolved Cleep RPC url and caches are kept warm between commands. Commands are
+    executed one at a time (they change current directory and standard streams).
+
+    Protocol is json lines: client sends request {args, cwd, version} and daemon streams back {out: data},
+    {err: data} and finally {exit: code}, or {fallback: reason} if command must be executed locally.
+    """
+
+    WARM_MODULES = [
+        'cleepcli.file',
+        'cleepcli.module',
+        'cleepcli.check',
+        'cleepcli.lint',
+        'cleepcli.test',
+        'cleepcli.docs',
+        'cleepcli.package',
+    ]
+    # long running or daemon related commands are executed by client
+    LOCAL_COMMANDS = ['daemon', 'watch']
+    # applications sources can change between commands, they are imported again by each command
+    APPS_PACKAGE = 'cleep.modules'
+
+    def __init__(self, cli, socket_path=None):
+        """
+        Constructor
+
+        Args:
+            cli (click.Command): cleep-cli main command
+            socket_path (string): unix socket path (default config.DAEMON_SOCKET)
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.cli = cli
+        self.socket_path = socket_path or config.DAEMON_SOCKET
+
+    def __is_running(self):
+        """
+        Return True if another daemon listens on socket
+
+        Returns:
+            bool: True if daemon is running
+        """
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.socket_path)
+            return True
+        except OSError:
+            return False
+        finally:
+            sock.close()
+
+    def __warm_up(self):
+        """
+        Import commands modules
+        """
+        start = time.time()
+        for module_name in self.WARM_MODULES:
+            try:
+                importlib.import_module(module_name)
+            except Exception as error:
+                self.logger.debug('Unable to preload "%s": %s', module_name, error)
+        self.logger.debug('Modules preloaded in %.2f seconds', time.time() - start)
+
+    def serve(self):
+        """
+        Serve commands until interrupted
+
+        Returns:
+            bool: False if daemon cannot be started
+        """
+        if self.__is_running():
+            self.logger.error('Cleep-cli daemon is already running on "%s"', self.socket_path)
+            return False
+        if os.path.exists(self.socket_path):
+            # stale socket of previous daemon
+            os.remove(self.socket_path)
+        os.makedirs(os.path.dirname(os.path.abspath(self.socket_path)), exist_ok=True)
+
+        self.__warm_up()
+        daemon = self
+        class RequestHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                daemon.handle_request(self.rfile, self.wfile)
+
+        server = socketserver.UnixStreamServer(self.socket_path, RequestHandler)
+        os.chmod(self.socket_path, 0o600)
+        self.logger.info('Cleep-cli daemon listening on "%s"', self.socket_path)
+        # stop gracefully (socket removal) on service stop
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        try:
+            server.serve_forever()
+        except (KeyboardInterrupt, SystemExit):
+            pass
+        finally:
+            server.server_close()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+        self.logger.info('Cleep-cli daemon stopped')
+
+        return True
+
+    def handle_request(self, rfile, wfile):
+        """
+        Handle client request
+
+        Args:
+            rfile (file): client socket file to read from
+            wfile (file): client socket file to write to
+        """
+        try:
+            request = json.loads(rfile.readline().decode('utf-8'))
+            args = request['args']
+            cwd = request['cwd']
+        except Exception:
+            self.logger.debug('Invalid request received', exc_info=True)
+            return
+
+        reply = lambda message: wfile.write((json.dumps(message) + '\n').encode('utf-8'))
+        if request.get('version') != VERSION:
+            reply({'fallback': 'version mismatch (daemon %s)' % VERSION})
+            return
+        if any([arg in self.LOCAL_COMMANDS for arg in args]):
+            reply({'fallback': 'local command'})
+            return
+
+        start = time.time()
+        code = self.execute(args, cwd, ClientStream(wfile, 'out'), ClientStream(wfile, 'err'))
+        self.logger.debug('Command "%s" executed in %.3f seconds (exit %s)', ' '.join(args), time.time() - start, code)
+        try:
+            reply({'exit': code})
+        except OSError:
+            pass
+
+    def __purge_applications(self):
+        """
+        Remove applications modules imported by previous commands
+        """
+        purged = [name for name in sys.modules if name.startswith(self.APPS_PACKAGE + '.')]
+        for name in purged:
+            del sys.modules[name]
+        importlib.invalidate_caches()
+        if purged:
+            self.logger.debug('%d applications modules purged', len(purged))
+
+    def execute(self, args, cwd, stdout, stderr):
+        """
+        Execute command with redirected standard streams
+
+        Args:
+            args (list): command line arguments
+            cwd (string): client current directory
+            stdout (file): stream to write stdout to
+            stderr (file): stream to write stderr to
+
+        Returns:
+            int: command exit code
+        """
+        saved_cwd = os.getcwd()
+        saved_streams = (sys.stdin, sys.stdout, sys.stderr)
+        # logging handlers hold stream they were created with
+        handlers = []
+        for handler in logging.getLogger().handlers:
+            if isinstance(handler, logging.StreamHandler) and handler.stream in saved_streams[1:]:
+                handlers.append((handler, handler.stream))
+
+        code = 0
+        self.__purge_applications()
+        try:
+            os.chdir(cwd)
+            # no stdin: prompts are aborted instead of blocking daemon
+            sys.stdin = io.StringIO('')
+            sys.stdout = stdout
+            sys.stderr = stderr
+            for handler, stream in handlers:
+                handler.setStream(stdout if stream is saved_streams[1] else stderr)
+            self.cli.main(args=args, prog_name='cleep-cli')
+        except SystemExit as error:
+            if isinstance(error.code, int) or error.code is None:
+                code = error.code or 0
+            else:
+                stderr.write('%s\n' % error.code)
+                code = 1
+        except Exception:
+            stderr.write(traceback.format_exc())
+            code = 1
+        finally:
+            for handler, stream in handlers:
+                handler.setStream(stream)
+            sys.stdin, sys.stdout, sys.stderr = saved_streams
+            os.chdir(saved_cwd)
+
+        return code
+
+def forward_command(args, socket_path=None):
+    """
+    Forward command to cleep-cli daemon and stream its output
+
+    Args:
+        args (list): command line arguments
+        socket_path (string): daemon unix socket path (default config.DAEMON_SOCKET)
+
+    Returns:
+        int: command exit code, None if command must be executed locally (no daemon, version mismatch...)
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path or config.DAEMON_SOCKET)
+    except OSError:
+        sock.close()
+        return None
+
+    with sock, sock.makefile('rwb') as sfile:
+        sfile.write((json.dumps({'args': args, 'cwd': os.getcwd(), 'version': VERSION}) + '\n').encode('utf-8'))
+        sfile.flush()
+        for line in sfile:
+            message = json.loads(line.decode('utf-8'))
+            if 'out' in message:
+                sys.stdout.write(message['out'])
+                sys.stdout.flush()
+            elif 'err' in message:
+                sys.stderr.write(message['err'])
+                sys.stderr.flush()
+            elif 'exit' in message:
+                return message['exit']
+            elif 'fallback' in message:
+                return None
+
+    # daemon stopped during command
+    sys.stderr.write('Cleep-cli daemon connection lost\n')
+    return 1
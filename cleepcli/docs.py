@@ -2,7 +2,6 @@
 # -*- coding: utf-8 -*-
 
 import os
-import time
 import json
 from .console import EndlessConsole, Console
 import logging
@@ -13,8 +12,8 @@ from github import Github
 from github.GithubException import BadCredentialsException, UnknownObjectException
 from urllib.parse import quote
 import base64
-from .cleepapi import CleepApi
-from .tools import is_cleep_running, get_cleep_url
+from .cleepapi import CleepApi, resolve_rpc_url
+from .tools import is_cleep_running
 from semver import Version
 import requests
 
@@ -34,16 +33,15 @@ class Docs():
 
     def __init__(self):
         self.logger = logging.getLogger(self.__class__.__name__)
-        self.__endless_command_running = False
         self.__endless_command_return_code = 0
         self.__module_version = None
         self.__module_author = None
 
     def __console_callback(self, stdout, stderr):
-        self.logger.info((stdout if stdout is not None else '') + (stderr if stderr is not None else ''))
+        for line in stdout + stderr:
+            self.logger.info(line)
 
     def __console_end_callback(self, return_code, killed):
-        self.__endless_command_running = False
         self.__endless_command_return_code = return_code
 
     def __get_module_data(self, module_name):
@@ -153,12 +151,9 @@ if [ $? -ne 0 ]; then echo "Error occured"; exit 1; fi
         }
 
         self.logger.debug('Docs cmd: %s' % cmd)
-        self.__endless_command_running = True
-        c = EndlessConsole(cmd, self.__console_callback, self.__console_end_callback)
+        c = EndlessConsole(cmd, self.__console_callback, self.__console_end_callback, bulk=True)
         c.start()
-
-        while self.__endless_command_running:
-            time.sleep(0.25)
+        c.join()
 
         self.logger.debug('Return code: %s' % self.__endless_command_return_code)
         if self.__endless_command_return_code!=0:
@@ -203,7 +198,7 @@ if [ $? -ne 0 ]; then echo "Error occured"; exit 1; fi
         Generate module docs by api call
         """
         self.logger.debug("Get module docs by api call")
-        rpc_url = get_cleep_url()
+        rpc_url = resolve_rpc_url()
         self.logger.debug('Cleep RPC url: %s', rpc_url)
         cleepapi = CleepApi(rpc_url)
         return cleepapi.get_documentation(module_name)
@@ -214,7 +209,7 @@ if [ $? -ne 0 ]; then echo "Error occured"; exit 1; fi
         """
         self.logger.debug("Get module docs by command line")
         console = Console()
-        resp = console.command(f"cleep --cidoc={module_name}")
+        resp = console.command(f"cleep --cidoc={module_name}", 120)
         self.logger.debug("Resp: %s", resp)
 
         if resp["returncode"] != 0:
@@ -273,12 +268,9 @@ if [ $? -ne 0 ]; then echo "Error occured"; exit 1; fi
         }
 
         self.logger.debug('Docs cmd: %s' % cmd)
-        self.__endless_command_running = True
-        c = EndlessConsole(cmd, self.__console_callback, self.__console_end_callback)
+        c = EndlessConsole(cmd, self.__console_callback, self.__console_end_callback, bulk=True)
         c.start()
-
-        while self.__endless_command_running:
-            time.sleep(0.25)
+        c.join()
 
         self.logger.debug('Return code: %s' % self.__endless_command_return_code)
         if self.__endless_command_return_code!=0:
@@ -3,6 +3,7 @@
 
 import os
 from .console import Console
+from .sync import Sync
 import logging
 from . import config
 
@@ -14,6 +15,124 @@ class File():
     def __init__(self):
         self.logger = logging.getLogger(self.__class__.__name__)
 
+    def __log_changes(self, changes):
+        """
+        Log synchronization changes
+
+        Args:
+            changes (list): list of sync changes
+        """
+        for change in changes:
+            for copied in change['copied']:
+                self.logger.debug('  copied: %s' % copied)
+            for deleted in change['deleted']:
+                self.logger.debug('  deleted: %s' % deleted)
+
+    def __get_core_syncs(self):
+        """
+        Return core synchronizations
+
+        Returns:
+            list: list of synchronizations::
+
+                [
+                    {
+                        src (string): source path (directory or file)
+                        dst (string): destination path
+                        excludes (list): exclude patterns
+                        delete (bool): delete destination files that don't exist in source
+                    },
+                    ...
+                ]
+
+        """
+        return [
+            {
+                'src': config.CORE_SRC,
+                'dst': config.CORE_DST,
+                'excludes': ['/tests/', 'modules', '*__pycache__*', '*.pyc'],
+                'delete': True,
+            },
+            {
+                'src': config.HTML_SRC,
+                'dst': config.HTML_DST,
+                'excludes': ['js/modules/', '*node_modules*'],
+                'delete': True,
+            },
+            {
+                'src': os.path.join(config.BIN_SRC, 'cleep'),
+                'dst': os.path.join(config.BIN_DST, 'cleep'),
+                'excludes': [],
+                'delete': False,
+            },
+            # sounds dir is synced inside destination sounds dir (same layout as before)
+            {
+                'src': os.path.join(config.MEDIA_SRC, 'sounds'),
+                'dst': os.path.join(config.MEDIA_DST, 'sounds', 'sounds'),
+                'excludes': [],
+                'delete': True,
+            },
+        ]
+
+    def __get_module_syncs(self, module_name):
+        """
+        Return module synchronizations
+
+        Args:
+            module_name (string): module name
+
+        Returns:
+            list: list of synchronizations (same format as __get_core_syncs)
+        """
+        return [
+            {
+                'src': os.path.join(config.MODULES_SRC, module_name, 'backend'),
+                'dst': os.path.join(config.MODULES_DST, module_name),
+                'excludes': ['*.pyc', '*__pycache__*'],
+                'delete': True,
+            },
+            {
+                'src': os.path.join(config.MODULES_SRC, module_name, 'frontend'),
+                'dst': os.path.join(config.MODULES_HTML_DST, module_name),
+                'excludes': ['*node_modules*'],
+                'delete': True,
+            },
+            {
+                'src': os.path.join(config.MODULES_SRC, module_name, 'scripts'),
+                'dst': os.path.join(config.MODULES_SCRIPTS_DST, module_name),
+                'excludes': ['*__pycache__*'],
+                'delete': True,
+            },
+        ]
+
+    def __get_path_sync(self, path):
+        """
+        Return synchronization handling specified source path
+
+        Args:
+            path (string): source path
+
+        Returns:
+            tuple: synchronization (dict) and path relative to synchronization source (None if path is
+                   synchronization source itself), or (None, None) if path is not synchronized
+        """
+        path = os.path.normpath(path)
+        modules_src = os.path.normpath(config.MODULES_SRC)
+        if path.startswith(modules_src + os.sep):
+            module_name = os.path.relpath(path, modules_src).split(os.sep)[0]
+            syncs = self.__get_module_syncs(module_name)
+        else:
+            syncs = self.__get_core_syncs()
+
+        for a_sync in syncs:
+            src = os.path.normpath(a_sync['src'])
+            if path == src:
+                return a_sync, None
+            if path.startswith(src + os.sep):
+                return a_sync, os.path.relpath(path, src)
+
+        return None, None
+
     def core_sync(self):
         """
         Synchronize core content between source and execution folders
@@ -22,34 +141,24 @@ class File():
         if not config.CORE_DST:
             raise Exception('Cleep needs to be installed before using this command')
 
-        c = Console()
-        variables = {
-            'REPO_DIR': config.REPO_DIR,
-            'CORE_DST': config.CORE_DST,
-            'HTML_DST': config.HTML_DST,
-            'BIN_DST': config.BIN_DST,
-            'MEDIA_DST': config.MEDIA_DST,
-            'CONFIG_DIR': config.CONFIG_DIR,
-        }
-        cmd = """
-mkdir -p "%(HTML_DST)s/"
-mkdir -p "%(CORE_DST)s/modules"
-mkdir -p "%(MEDIA_DST)s/modules"
-mkdir -p "%(CONFIG_DIR)s"
-rsync -av "%(REPO_DIR)s/cleep/" "%(CORE_DST)s/" --exclude "/tests/" --exclude "modules" --exclude "*__pycache__*" --delete --exclude "*.pyc" --keep-dirlinks
-rsync -av "%(REPO_DIR)s/html/" "%(HTML_DST)s/" --delete --exclude "js/modules/" --exclude "*node_modules*"
-rsync -av "%(REPO_DIR)s/bin/cleep" "%(BIN_DST)s/cleep"
-rsync -av "%(REPO_DIR)s/medias/sounds" "%(MEDIA_DST)s/sounds/" --delete
-    """ % variables
-        self.logger.debug('Coresync cmd: %s' % cmd)
-        resp = c.command(cmd, 15)
-        self.logger.debug('Coresync stdout:\n%s' % '\n'.join(resp['stdout']))
-        if resp['stderr']:
-            self.logger.debug('Coresync stderr:\n%s' % '\n'.join(resp['stderr']))
-        if resp['error'] or resp['killed']:
-            self.logger.error('Error occured while sync core content: %s' % ('killed' if resp['killed'] else resp['stderr']))
+        sync = Sync()
+        try:
+            os.makedirs(config.HTML_DST, exist_ok=True)
+            os.makedirs(os.path.join(config.CORE_DST, 'modules'), exist_ok=True)
+            os.makedirs(os.path.join(config.MEDIA_DST, 'modules'), exist_ok=True)
+            os.makedirs(config.CONFIG_DIR, exist_ok=True)
+
+            changes = []
+            for a_sync in self.__get_core_syncs():
+                changes.append(sync.sync(a_sync['src'], a_sync['dst'], excludes=a_sync['excludes'], delete=a_sync['delete']))
+        except Exception as e:
+            self.logger.debug('Coresync error:', exc_info=True)
+            self.logger.error('Error occured while sync core content: %s' % str(e))
             return False
 
+        self.logger.debug('Coresync changes:')
+        self.__log_changes(changes)
+
         return True
 
     def module_sync(self, module_name):
@@ -63,42 +172,63 @@ rsync -av "%(REPO_DIR)s/medias/sounds" "%(MEDIA_DST)s/sounds/" --delete
         if not os.path.exists(os.path.join(config.MODULES_DST, module_name)):
             os.makedirs(os.path.join(config.MODULES_DST, module_name))
 
-        mod_backend_src = os.path.join(config.MODULES_SRC, module_name, 'backend/')
-        mod_backend_dst = os.path.join(config.MODULES_DST, module_name)
-        mod_frontend_src = os.path.join(config.MODULES_SRC, module_name, 'frontend/')
-        mod_frontend_dst = os.path.join(config.MODULES_HTML_DST, module_name)
-        mod_scripts_src = os.path.join(config.MODULES_SRC, module_name, 'scripts/')
-        mod_scripts_dst = os.path.join(config.MODULES_SCRIPTS_DST, module_name)
-
-        c = Console()
-        cmd = """ 
-if [ -d "%(BACKEND_SRC)s" ]; then
-    /bin/mkdir -p "%(BACKEND_DST)s"
-    rsync -av "%(BACKEND_SRC)s" "%(BACKEND_DST)s" --delete --exclude "*.pyc" --exclude "*__pycache__*"
-fi
-if [ -d "%(FRONTEND_SRC)s" ]; then
-    /bin/mkdir -p "%(FRONTEND_DST)s"
-    rsync -av "%(FRONTEND_SRC)s" "%(FRONTEND_DST)s" --delete --exclude "*node_modules*"
-fi
-if [ -d "%(SCRIPTS_SRC)s" ]; then
-    /bin/mkdir -p "%(SCRIPTS_DST)s"
-    rsync -av "%(SCRIPTS_SRC)s" "%(SCRIPTS_DST)s" --delete --exclude "*__pycache__*"
-fi
-    """ % { 
-            'BACKEND_SRC': mod_backend_src, 'BACKEND_DST': mod_backend_dst,
-            'FRONTEND_SRC': mod_frontend_src, 'FRONTEND_DST': mod_frontend_dst,
-            'SCRIPTS_SRC': mod_scripts_src, 'SCRIPTS_DST': mod_scripts_dst
-        }
-        self.logger.debug('Modsync cmd: %s' % cmd)
-        resp = c.command(cmd, 15) 
-
-        self.logger.debug('Modsync stdout:\n%s' % '\n'.join(resp['stdout']))
-        if resp['stderr']:
-            self.logger.debug('Modsync stderr:\n%s' % '\n'.join(resp['stderr']))
-        if resp['error'] or resp[u'killed']:
-            self.logger.error(u'Error occured while sync module content: %s' % (u'killed' if resp[u'killed'] else resp[u'stderr']))
+        sync = Sync()
+        changes = []
+        try:
+            for a_sync in self.__get_module_syncs(module_name):
+                if os.path.isdir(a_sync['src']):
+                    changes.append(sync.sync(a_sync['src'], a_sync['dst'], excludes=a_sync['excludes'], delete=a_sync['delete']))
+        except Exception as e:
+            self.logger.debug('Modsync error:', exc_info=True)
+            self.logger.error('Error occured while sync module content: %s' % str(e))
             return False
 
+        self.logger.debug('Modsync changes:')
+        self.__log_changes(changes)
+
+        return True
+
+    def paths_sync(self, paths):
+        """
+        Synchronize only specified source paths (core or modules) to execution folders
+        Paths can be modified, created, deleted or renamed files or directories.
+
+        Args:
+            paths (list): list of source paths
+
+        Returns:
+            bool: True if paths synchronized, False if error occured (full sync should be performed)
+        """
+        if not config.CORE_DST:
+            raise Exception('Cleep needs to be installed before using this command')
+
+        # group paths by synchronization
+        syncs = {}
+        for path in paths:
+            a_sync, relpath = self.__get_path_sync(path)
+            if not a_sync:
+                self.logger.debug('Path "%s" is not synchronized' % path)
+                continue
+            syncs.setdefault(a_sync['src'], (a_sync, []))[1].append(relpath)
+
+        sync = Sync()
+        changes = []
+        try:
+            for a_sync, relpaths in syncs.values():
+                if None in relpaths:
+                    # synchronization source itself changed
+                    if os.path.exists(a_sync['src']):
+                        changes.append(sync.sync(a_sync['src'], a_sync['dst'], excludes=a_sync['excludes'], delete=a_sync['delete']))
+                    continue
+                changes.append(sync.sync_paths(a_sync['src'], a_sync['dst'], relpaths, excludes=a_sync['excludes'], delete=a_sync['delete']))
+        except Exception as e:
+            self.logger.debug('Pathsync error:', exc_info=True)
+            self.logger.error('Error occured while sync paths: %s' % str(e))
+            return False
+
+        self.logger.debug('Pathsync changes:')
+        self.__log_changes(changes)
+
         return True
 
     def module_run_install_scripts(self, module_name):
@@ -0,0 +1,324 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import errno
+import struct
+import select
+import ctypes
+import ctypes.util
+import logging
+from threading import Thread
+import watchdog.events as events
+from . import config
+
+class InotifyWatcher(Thread):
+    """
+    Linux inotify watcher of Cleep sources
+
+    Unlike watchdog recursive observer on whole repository, watches are only registered on Cleep sources
+    directories (cleep, html, bin, medias and modules backend, frontend and scripts directories). Ignored
+    directories (.git, node_modules, __pycache__...) are pruned at registration so their events are never
+    received. New directories (and new modules) are watched as soon as they are created.
+
+    Events are sent to handler as watchdog events (on_any_event function)
+    """
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_ISDIR = 0x40000000
+    IN_CLOEXEC = 0o2000000
+    IN_NONBLOCK = 0o4000
+
+    WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_ONLYDIR
+    EVENT_HEADER = struct.Struct('iIII')
+    READ_SIZE = 65536
+    POLL_TIMEOUT = 0.5  # seconds
+
+    PRUNED_DIRS = [
+        '.git',
+        '.vscode',
+        '.editor',
+        '__pycache__',
+        'node_modules',
+    ]
+    MODULE_DIRS = ['backend', 'frontend', 'scripts']
+
+    def __init__(self, handler):
+        """
+        Constructor
+
+        Args:
+            handler (FileSystemEventHandler): watchdog events handler
+        """
+        Thread.__init__(self)
+        self.daemon = True
+
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.handler = handler
+        self.running = True
+        self.__libc = None
+        self.__fd = None
+        self.__paths = {}
+        self.__wds = {}
+        self.__roots = [
+            os.path.normpath(config.CORE_SRC),
+            os.path.normpath(config.HTML_SRC),
+            os.path.normpath(config.BIN_SRC),
+            os.path.normpath(config.MEDIA_SRC),
+        ]
+        self.__pruned_paths = [
+            os.path.join(os.path.normpath(config.CORE_SRC), 'tests'),
+            os.path.join(os.path.normpath(config.CORE_SRC), 'modules'),
+            os.path.join(os.path.normpath(config.HTML_SRC), 'js', 'modules'),
+        ]
+        self.__modules_src = os.path.normpath(config.MODULES_SRC)
+
+    @staticmethod
+    def is_supported():
+        """
+        Return True if inotify is available on this system
+
+        Returns:
+            bool: True if supported
+        """
+        if not sys.platform.startswith('linux'):
+            return False
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        return hasattr(libc, 'inotify_init1')
+
+    def get_watches_count(self):
+        """
+        Return number of registered watches
+
+        Returns:
+            int: number of watches
+        """
+        return len(self.__wds)
+
+    def start(self):
+        """
+        Register watches and start watching
+        """
+        self.__libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.__fd = self.__libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.__fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed: %s' % os.strerror(ctypes.get_errno()))
+
+        for root in self.__roots:
+            self.__add_watches(root)
+        self.__add_watches(self.__modules_src)
+
+        Thread.start(self)
+
+    def stop(self):
+        """
+        Stop watching
+        """
+        self.running = False
+
+    def __is_watched_dir(self, path):
+        """
+        Return True if directory must be watched
+
+        Args:
+            path (string): directory path
+
+        Returns:
+            bool: True if directory must be watched
+        """
+        if os.path.basename(path) in self.PRUNED_DIRS or path in self.__pruned_paths:
+            return False
+
+        for root in self.__roots:
+            if path == root or path.startswith(root + os.sep):
+                return True
+
+        # modules dir and modules dirs are watched to detect new modules and new module dirs
+        if path == self.__modules_src:
+            return True
+        if path.startswith(self.__modules_src + os.sep):
+            parts = os.path.relpath(path, self.__modules_src).split(os.sep)
+            return len(parts) == 1 or parts[1] in self.MODULE_DIRS
+
+        return False
+
+    def __add_watch(self, path):
+        """
+        Add watch on specified directory
+
+        Args:
+            path (string): directory path
+
+        Returns:
+            bool: True if watch added
+        """
+        wd = self.__libc.inotify_add_watch(self.__fd, os.fsencode(path), self.WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            if error == errno.ENOSPC:
+                self.logger.error(
+                    'Inotify watches limit reached, "%s" is not watched (increase fs.inotify.max_user_watches)' % path
+                )
+            elif error not in (errno.ENOENT, errno.ENOTDIR):
+                self.logger.warning('Unable to watch "%s": %s' % (path, os.strerror(error)))
+            return False
+
+        self.__paths[wd] = path
+        self.__wds[path] = wd
+        return True
+
+    def __add_watches(self, path, emit=False):
+        """
+        Add watches on specified directory and its sub directories, pruning ignored directories
+
+        Args:
+            path (string): directory path
+            emit (bool): send modified event for each existing file (new directory content may have been
+                         written before watch is registered)
+        """
+        if not self.__is_watched_dir(path) or not self.__add_watch(path):
+            return
+
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        self.__add_watches(entry.path, emit)
+                    elif emit:
+                        self.__dispatch(events.FileModifiedEvent(entry.path))
+        except OSError:
+            # directory removed meanwhile
+            pass
+
+    def __forget_watches(self, path):
+        """
+        Forget watches of specified directory and its sub directories (after directory is deleted or moved)
+
+        Args:
+            path (string): directory path
+        """
+        for watched_path in list(self.__wds.keys()):
+            if watched_path == path or watched_path.startswith(path + os.sep):
+                wd = self.__wds.pop(watched_path)
+                if self.__paths.get(wd) == watched_path:
+                    del self.__paths[wd]
+
+    def __dispatch(self, event):
+        """
+        Send event to handler
+
+        Args:
+            event (FileSystemEvent): watchdog event
+        """
+        try:
+            self.handler.on_any_event(event)
+        except Exception:
+            self.logger.exception('Error dispatching event %s:' % event)
+
+    def __read_events(self):
+        """
+        Read and parse available inotify events
+
+        Returns:
+            list: list of events::
+
+                [
+                    (mask (int), cookie (int), path (string)),
+                    ...
+                ]
+
+        """
+        try:
+            buf = os.read(self.__fd, self.READ_SIZE)
+        except BlockingIOError:
+            return []
+
+        raw_events = []
+        offset = 0
+        while offset + self.EVENT_HEADER.size <= len(buf):
+            wd, mask, cookie, length = self.EVENT_HEADER.unpack_from(buf, offset)
+            offset += self.EVENT_HEADER.size
+            name = buf[offset:offset + length].rstrip(b'\0')
+            offset += length
+
+            if mask & self.IN_Q_OVERFLOW:
+                self.logger.warning('Inotify events queue overflowed, some changes may be missed (run coresync/modsync)')
+                continue
+            if mask & self.IN_IGNORED:
+                path = self.__paths.pop(wd, None)
+                if path and self.__wds.get(path) == wd:
+                    del self.__wds[path]
+                continue
+            dir_path = self.__paths.get(wd)
+            if dir_path is None:
+                continue
+            raw_events.append((mask, cookie, os.path.join(dir_path, os.fsdecode(name)) if name else dir_path))
+
+        return raw_events
+
+    def __process_events(self, raw_events):
+        """
+        Convert inotify events to watchdog events and dispatch them
+
+        Args:
+            raw_events (list): list of inotify events (see __read_events)
+        """
+        moved_from = {}
+        for mask, cookie, path in raw_events:
+            is_dir = bool(mask & self.IN_ISDIR)
+
+            if mask & self.IN_CREATE:
+                # created files are always followed by close write event
+                if is_dir:
+                    self.__add_watches(path, emit=True)
+
+            elif mask & self.IN_CLOSE_WRITE:
+                self.__dispatch(events.FileModifiedEvent(path))
+
+            elif mask & self.IN_DELETE:
+                if is_dir:
+                    self.__forget_watches(path)
+                    self.__dispatch(events.DirDeletedEvent(path))
+                else:
+                    self.__dispatch(events.FileDeletedEvent(path))
+
+            elif mask & self.IN_MOVED_FROM:
+                moved_from[cookie] = (path, is_dir)
+
+            elif mask & self.IN_MOVED_TO:
+                src = moved_from.pop(cookie, None)
+                if is_dir:
+                    if src:
+                        self.__forget_watches(src[0])
+                    self.__add_watches(path, emit=src is None)
+                if src:
+                    self.__dispatch((events.DirMovedEvent if is_dir else events.FileMovedEvent)(src[0], path))
+                elif not is_dir:
+                    # moved from unwatched directory
+                    self.__dispatch(events.FileModifiedEvent(path))
+
+        # moved to unwatched directory
+        for path, is_dir in moved_from.values():
+            if is_dir:
+                self.__forget_watches(path)
+            self.__dispatch((events.DirDeletedEvent if is_dir else events.FileDeletedEvent)(path))
+
+    def run(self):
+        """
+        Main process: read inotify events and dispatch them
+        """
+        try:
+            while self.running:
+                readable, _, _ = select.select([self.__fd], [], [], self.POLL_TIMEOUT)
+                if readable:
+                    self.__process_events(self.__read_events())
+        finally:
+            os.close(self.__fd)
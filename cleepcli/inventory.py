@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import logging
+from collections import namedtuple
+from threading import Lock
+
+InventoryEntry = namedtuple(
+    'InventoryEntry',
+    ['fullpath', 'path', 'filename', 'kind', 'extension', 'size', 'mtime'],
+)
+
+class ModuleInventory():
+    """
+    Inventory of module files
+
+    A directory tree is walked once (os.scandir) and its entries are cached until one of its directories is
+    modified (entry added, removed or renamed), so all checks and packaging share the same walk. Hidden
+    entries are skipped, like glob does.
+
+    Note:
+        Cache is validated with directories mtime only: size and mtime of entries are the ones of the walk
+        (a file content change does not invalidate cache).
+    """
+
+    KIND_FILE = 'file'
+    KIND_DIR = 'dir'
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.__lock = Lock()
+        self.__cache = {}
+
+    def get(self, root, subdir=None):
+        """
+        Return entries of specified directory tree
+
+        Args:
+            root (string): root directory
+            subdir (string): return only entries of this root sub directory (ex: tests)
+
+        Returns:
+            list: list of entries sorted by path (paths are relative to root)::
+
+                [
+                    InventoryEntry(
+                        fullpath (string): entry fullpath
+                        path (string): entry path relative to root
+                        filename (string): entry name
+                        kind (string): KIND_FILE or KIND_DIR
+                        extension (string): file extension (with dot)
+                        size (int): file size
+                        mtime (float): entry modification time
+                    ),
+                    ...
+                ]
+
+        """
+        root = os.path.normpath(root)
+        with self.__lock:
+            cached = self.__cache.get(root)
+            if not cached or not self.__is_valid(cached['dirs']):
+                cached = self.__walk(root)
+                if cached['dirs']:
+                    self.__cache[root] = cached
+                else:
+                    # root does not exist
+                    self.__cache.pop(root, None)
+            entries = cached['entries']
+
+        if subdir is None:
+            return entries
+        prefix = subdir.strip('/') + '/'
+        return [entry for entry in entries if entry.path.startswith(prefix)]
+
+    def invalidate(self, root=None):
+        """
+        Drop cached entries
+
+        Args:
+            root (string): root directory to invalidate (all if None)
+        """
+        with self.__lock:
+            if root is None:
+                self.__cache.clear()
+            else:
+                self.__cache.pop(os.path.normpath(root), None)
+
+    def __is_valid(self, dirs):
+        """
+        Check cached walk is still valid
+
+        Args:
+            dirs (dict): walked directories mtimes
+
+        Returns:
+            bool: True if no directory was modified
+        """
+        try:
+            return all([os.stat(path).st_mtime_ns == mtime for path, mtime in dirs.items()])
+        except OSError:
+            return False
+
+    def __walk(self, root):
+        """
+        Walk directory tree
+
+        Args:
+            root (string): root directory
+
+        Returns:
+            dict: walk result::
+
+                {
+                    entries (list): list of InventoryEntry
+                    dirs (dict): walked directories mtimes (ns)
+                }
+
+        """
+        entries = []
+        dirs = {}
+        visited = set()
+        to_walk = [(root, '')]
+        while to_walk:
+            path, relpath = to_walk.pop()
+            try:
+                stat = os.stat(path)
+                if (stat.st_dev, stat.st_ino) in visited:
+                    # symlinks loop
+                    continue
+                visited.add((stat.st_dev, stat.st_ino))
+                dirs[path] = stat.st_mtime_ns
+                with os.scandir(path) as it:
+                    dir_entries = list(it)
+            except OSError:
+                # directory removed meanwhile
+                continue
+
+            for entry in dir_entries:
+                if entry.name.startswith('.'):
+                    continue
+                try:
+                    stat = entry.stat()
+                    is_dir = entry.is_dir()
+                except OSError:
+                    # broken link
+                    continue
+                entry_relpath = relpath + entry.name
+                entries.append(InventoryEntry(
+                    entry.path,
+                    entry_relpath,
+                    entry.name,
+                    self.KIND_DIR if is_dir else self.KIND_FILE,
+                    '' if is_dir else os.path.splitext(entry.name)[1],
+                    0 if is_dir else stat.st_size,
+                    stat.st_mtime,
+                ))
+                if is_dir:
+                    to_walk.append((entry.path, entry_relpath + '/'))
+
+        self.logger.trace('Walked "%s": %d entries' % (root, len(entries)))
+        return {
+            'entries': sorted(entries, key=lambda entry: entry.path),
+            'dirs': dirs,
+        }
+
+_inventory = None
+_inventory_lock = Lock()
+
+def get_inventory():
+    """
+    Return module inventory shared by checks and packaging
+
+    Returns:
+        ModuleInventory: shared instance
+    """
+    global _inventory
+    with _inventory_lock:
+        if _inventory is None:
+            _inventory = ModuleInventory()
+        return _inventory
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import logging
+from threading import Lock
+from astroid import MANAGER
+from pylint.lint import Run
+from pylint.reporters import BaseReporter
+
+class MessagesReporter(BaseReporter):
+    """
+    Pylint reporter that keeps messages and linted modules instead of displaying them
+    """
+
+    name = 'cleepcli'
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        BaseReporter.__init__(self)
+        self.messages = []
+        self.modules = {}
+
+    def handle_message(self, msg):
+        self.messages.append(msg)
+
+    def on_set_current_module(self, module, filepath):
+        self.modules[module] = filepath
+
+    def display_messages(self, layout):
+        pass
+
+    def display_reports(self, layout):
+        pass
+
+    def _display(self, layout):
+        pass
+
+class CodeLinter():
+    """
+    Run pylint in-process and return structured messages
+
+    Astroid trees of imported modules (python stdlib, cleep core...) are kept in astroid cache between runs,
+    so modules linted in the same cleep-cli invocation (or daemon) do not parse them again. Cached trees of
+    modified files and of other applications are dropped before each run. Cache is only reused when linting
+    in-process (jobs=1).
+    """
+
+    CATEGORIES = ['F', 'E', 'W', 'R', 'C']
+    # all applications sources are linted as this package
+    APP_PACKAGE = 'backend'
+
+    # pylint and astroid use global state
+    __lock = Lock()
+    __cache_mtimes = {}
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def __refresh_ast_cache(self):
+        """
+        Drop cached astroid trees of files modified since they were parsed (lock must be acquired)
+        """
+        for modname, module in list(MANAGER.astroid_cache.items()):
+            filepath = getattr(module, 'file', None)
+            if not filepath or not filepath.endswith('.py'):
+                continue
+            try:
+                mtime = os.stat(filepath).st_mtime_ns
+            except OSError:
+                mtime = None
+            if modname not in self.__cache_mtimes:
+                self.__cache_mtimes[modname] = mtime
+            elif self.__cache_mtimes[modname] != mtime:
+                self.logger.trace('Drop outdated astroid tree of "%s"' % modname)
+                MANAGER.astroid_cache.pop(modname, None)
+                self.__cache_mtimes.pop(modname)
+
+    def __purge_other_apps(self, filepaths):
+        """
+        Drop cached astroid trees of other applications (lock must be acquired)
+
+        Application files are all parsed as "backend" package modules, so trees of previously linted application
+        would be used when linting a new one.
+
+        Args:
+            filepaths (list): files about to be linted
+        """
+        roots = set()
+        for filepath in filepaths:
+            root = os.path.dirname(filepath)
+            while os.path.basename(root) != self.APP_PACKAGE and os.path.dirname(root) != root:
+                root = os.path.dirname(root)
+            roots.add((root if os.path.basename(root) == self.APP_PACKAGE else os.path.dirname(filepath)) + os.sep)
+
+        for modname, module in list(MANAGER.astroid_cache.items()):
+            if modname != self.APP_PACKAGE and not modname.startswith(self.APP_PACKAGE + '.'):
+                continue
+            filepath = getattr(module, 'file', None)
+            if filepath and any(os.path.abspath(filepath).startswith(root) for root in roots):
+                continue
+            self.logger.trace('Drop astroid tree of "%s" from other application' % modname)
+            MANAGER.astroid_cache.pop(modname, None)
+            self.__cache_mtimes.pop(modname, None)
+
+    def lint(self, filepaths, pylintrc_path=None, jobs=1, args=None):
+        """
+        Lint specified files
+
+        Args:
+            filepaths (list): python files to lint
+            pylintrc_path (string): pylint configuration file
+            jobs (int): number of pylint processes (1 to lint in-process and reuse astroid cache)
+            args (list): other pylint command line options (ex: --disable=all)
+
+        Returns:
+            dict: lint result by file fullpath (None if linter failed)::
+
+            {
+                fullpath (string): {
+                    messages (list): list of messages::
+                    [
+                        {
+                            code (string): pylint code
+                            symbol (string): pylint message symbol
+                            msg (string): pylint message
+                            line (int): message line
+                            column (int): message column
+                        },
+                        ...
+                    ]
+                    statements (int): number of statements analysed
+                },
+                ...
+            }
+
+        """
+        filepaths = [os.path.abspath(filepath) for filepath in filepaths]
+        args = ['--reports=n', '--score=n', '--jobs=%d' % jobs] + (args or [])
+        if pylintrc_path:
+            args.append('--rcfile=%s' % pylintrc_path)
+
+        reporter = MessagesReporter()
+        with self.__lock:
+            self.__purge_other_apps(filepaths)
+            self.__refresh_ast_cache()
+            try:
+                run = Run(args + filepaths, reporter=reporter, exit=False)
+            except (Exception, SystemExit):
+                self.logger.exception('Pylint execution failed on %s' % filepaths)
+                return dict([(filepath, None) for filepath in filepaths])
+            self.__refresh_ast_cache()
+
+        out = dict([(filepath, {'messages': [], 'statements': 0}) for filepath in filepaths])
+        by_module = run.linter.stats.by_module if hasattr(run.linter.stats, 'by_module') else run.linter.stats['by_module']
+        for modname, filepath in reporter.modules.items():
+            filepath = os.path.abspath(filepath) if filepath else None
+            if filepath in out and modname in by_module:
+                out[filepath]['statements'] = by_module[modname]['statement']
+        for msg in reporter.messages:
+            filepath = os.path.abspath(msg.abspath)
+            if filepath not in out or msg.C not in self.CATEGORIES:
+                continue
+            out[filepath]['messages'].append({
+                'code': msg.msg_id,
+                'symbol': msg.symbol,
+                'msg': msg.msg,
+                'line': msg.line,
+                'column': msg.column,
+            })
+
+        return out
@@ -17,6 +17,9 @@ import json
 import copy
 import hashlib
 import requests
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import nullcontext
+from threading import Lock
 
 class Package():
     """
@@ -29,10 +32,10 @@ class Package():
     BACKEND_DIR = 'backend/'
     SCRIPTS_DIR = 'scripts/'
     TESTS_DIR = 'tests/'
+    CHECKS_WORKERS = 4
 
     def __init__(self):
         self.logger = logging.getLogger(self.__class__.__name__)
-        self.__endless_command_running = False
         self.__endless_command_return_code = 0
 
     def __compute_sha256(self, fullpath):
@@ -53,11 +56,11 @@ class Package():
         return sha256_hash.hexdigest()
 
     def __console_callback(self, stdout, stderr):
-        self.logger.info((stdout if stdout is not None else '') + (stderr if stderr is not None else ''))
+        for line in stdout + stderr:
+            self.logger.info(line)
 
     def __console_end_callback(self, return_code, killed):
         self.__endless_command_return_code = return_code
-        self.__endless_command_running = False
 
     def check_cleep_version(self):
         """
@@ -77,7 +80,7 @@ fi
         """
 
         c = Console()
-        result = c.command(cmd)
+        result = c.command(cmd, 30)
 
         self.logger.debug('Return code: %s' % result['returncode'])
         if result['returncode'] != 0:
@@ -201,12 +204,9 @@ SHA256="cleep_"$VERSION"_armhf.sha256"
 # rm -f cleep.deb
 sha256sum $DEB > $SHA256
         """ % (config.REPO_DIR)
-        self.__endless_command_running = True
-        c = EndlessConsole(cmd, self.__console_callback, self.__console_end_callback)
+        c = EndlessConsole(cmd, self.__console_callback, self.__console_end_callback, bulk=True)
         c.start()
-
-        while self.__endless_command_running:
-            time.sleep(0.25)
+        c.join()
 
         self.logger.debug('Return code: %s' % self.__endless_command_return_code)
         if self.__endless_command_return_code != 0:
@@ -272,7 +272,7 @@ sha256sum $DEB > $SHA256
         cmd = 'sed -n "/cleep (%(version)s)/,/Checksums-Sha1:/{/cleep (%(version)s)/b;/Checksums-Sha1:/b;p}" %(changes)s | tail -n +2' % {'version': version, 'changes': changes}
         self.logger.debug('Cmd = %s' % cmd)
         c = Console()
-        result = c.command(cmd)
+        result = c.command(cmd, 30)
         if result['error']:
             self.logger.error('Unable to read changelog')
         changelog = '\n'.join([line.strip() for line in result['stdout']])
@@ -370,6 +370,117 @@ sha256sum $DEB > $SHA256
         #        self.logger.exception('Error occured creating new release:')
         #        return False
 
+    def __run_checks(self, checks, validate):
+        """
+        Run checks concurrently according to their dependencies
+
+        A check is started as soon as checks it requires are done. Exclusive checks use process global state
+        (application import, in-process linter) and never run at the same time.
+
+        Each check result is validated as soon as it is available. On first blocking error, checks not
+        started yet are cancelled, but running checks cannot be interrupted: error is raised once they are
+        terminated (nothing keeps running in background, for example in daemon).
+
+        Args:
+            checks (list): list of checks::
+
+                [
+                    {
+                        name (string): check name
+                        run (function): check function, returns check result
+                        requires (list): names of checks that must be done before (optional)
+                        exclusive (bool): True if check must not run with other exclusive checks (optional)
+                    },
+                    ...
+                ]
+
+            validate (function): validation function called with check name, check result and results of
+                                 previous checks. It raises an exception if check result is blocking
+
+        Returns:
+            dict: checks results by check name
+
+        Raises:
+            Exception: first check or validation error
+        """
+        exclusive_lock = Lock()
+        def run_check(check):
+            with exclusive_lock if check.get('exclusive') else nullcontext():
+                start = time.time()
+                return check['run'](), time.time() - start
+
+        start = time.time()
+        results = {}
+        timings = {}
+        pending = list(checks)
+        running = {}
+        executor = ThreadPoolExecutor(max_workers=self.CHECKS_WORKERS)
+        try:
+            while pending or running:
+                for check in list(pending):
+                    if all([name in results for name in check.get('requires', [])]):
+                        pending.remove(check)
+                        running[executor.submit(run_check, check)] = check
+                if not running:
+                    raise Exception('Invalid checks dependencies: %s' % [check['name'] for check in pending])
+
+                done, _ = wait(running.keys(), return_when=FIRST_COMPLETED)
+                for future in done:
+                    check = running.pop(future)
+                    data, duration = future.result()
+                    timings[check['name']] = duration
+                    self.logger.debug('Check "%s" done in %.2f seconds' % (check['name'], duration))
+                    validate(check['name'], data, results)
+                    results[check['name']] = data
+        finally:
+            # checks not started are cancelled, running ones are waited
+            for future in running:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+        self.logger.info('Checks done in %.2f seconds (%s)' % (
+            time.time() - start,
+            ', '.join(['%s %.2fs' % (name, duration) for name, duration in sorted(timings.items(), key=lambda item: item[1], reverse=True)]),
+        ))
+        return results
+
+    def __validate_check(self, module_name, name, data, results):
+        """
+        Validate check result before packaging
+
+        Args:
+            module_name (string): module name
+            name (string): check name
+            data (dict): check result
+            results (dict): results of previous checks (including required ones)
+
+        Raises:
+            Exception: if check result prevents from packaging application
+        """
+        if name == 'backend' and len(data['errors']) > 0:
+            raise Exception('Error in backend. Fix it before packaging application: %s' % data['errors'])
+        if name == 'frontend' and len(data['errors']) > 0:
+            raise Exception('Error in frontend. Fix it before packaging application: %s' % data['errors'])
+        if name == 'scripts' and len(data['errors']) > 0:
+            raise Exception('Error in scripts. Fix it before packaging application: %s' % data['errors'])
+        if name == 'tests' and len(data['errors']) > 0:
+            raise Exception('Error in tests. Fix it before packaging application: %s' % data['errors'])
+        if name == 'changelog':
+            logging.debug('Changelog: %s' % data)
+            if data['version'] != results['backend']['metadata']['version']:
+                raise Exception('Changelog does not seems to have been updated (no version "%s" found)' % results['backend']['metadata']['version'])
+            if data['unreleased']:
+                raise Exception('Changelog has UNRELEASED flag enabled, please remove it before publishing')
+        if name == 'code quality':
+            if len(data['errors']) > 0:
+                raise Exception('Error in code quality. Fix it before packaging application: %s' % data['errors'])
+            if data['score'] < 7.0:
+                raise Exception('Code quality for app "%s" is too low to be packaged (%s). Please improve it to be greater than 7.0' % (module_name, data['score']))
+        if name == 'documentation' and data['error']:
+            raise Exception('Documentation is invalid. Please fix it before publishing')
+        if name == 'breaking changes' and len(data['errors']) > 0:
+            raise Exception('There are breaking changes in your new version. Please fix it before publishing')
+
     def build_module(self, module_name, ci=False):
         """
         Build module package
@@ -394,35 +505,24 @@ sha256sum $DEB > $SHA256
         # collect data
         check = Check()
         docs = Docs()
-        data_backend = check.check_backend(module_name)
-        if len(data_backend['errors']) > 0:
-            raise Exception('Error in backend. Fix it before packaging application: %s' % data_backend['errors'])
-        data_frontend = check.check_frontend(module_name)
-        if len(data_frontend['errors']) > 0:
-            raise Exception('Error in frontend. Fix it before packaging application: %s' % data_frontend['errors'])
-        data_scripts = check.check_scripts(module_name)
-        if len(data_scripts['errors']) > 0:
-            raise Exception('Error in scripts. Fix it before packaging application: %s' % data_scripts['errors'])
-        data_tests = check.check_tests(module_name)
-        if len(data_tests['errors']) > 0:
-            raise Exception('Error in tests. Fix it before packaging application: %s' % data_tests['errors'])
-        data_changelog = check.check_changelog(module_name)
-        logging.debug('Changelog: %s' % data_changelog)
-        if data_changelog['version'] != data_backend['metadata']['version']:
-            raise Exception('Changelog does not seems to have been updated (no version "%s" found)' % data_backend['metadata']['version'])
-        if data_changelog['unreleased']:
-            raise Exception('Changelog has UNRELEASED flag enabled, please remove it before publishing')
-        data_code_quality = check.check_code_quality(module_name)
-        if len(data_code_quality['errors']) > 0:
-            raise Exception('Error in code quality. Fix it before packaging application: %s' % data_code_quality['errors'])
-        if data_code_quality['score'] < 7.0:
-            raise Exception('Code quality for app "%s" is too low to be packaged (%s). Please improve it to be greater than 7.0' % (module_name, data_code_quality['score']))
-        data_documentation = check.check_module_documentation(module_name)
-        if data_documentation['error']:
-            raise Exception('Documentation is invalid. Please fix it before publishing')
-        data_breaking_changes = docs.check_module_breaking_changes(module_name)
-        if len(data_breaking_changes['errors']) > 0:
-            raise Exception('There are breaking changes in your new version. Please fix it before publishing')
+        results = self.__run_checks([
+            {'name': 'backend', 'run': lambda: check.check_backend(module_name), 'exclusive': True},
+            {'name': 'frontend', 'run': lambda: check.check_frontend(module_name)},
+            {'name': 'scripts', 'run': lambda: check.check_scripts(module_name)},
+            {'name': 'tests', 'run': lambda: check.check_tests(module_name)},
+            # changelog version is compared to backend version
+            {'name': 'changelog', 'run': lambda: check.check_changelog(module_name), 'requires': ['backend']},
+            {'name': 'code quality', 'run': lambda: check.check_code_quality(module_name), 'exclusive': True},
+            {'name': 'documentation', 'run': lambda: check.check_module_documentation(module_name)},
+            # breaking changes are searched in generated documentation
+            {'name': 'breaking changes', 'run': lambda: docs.check_module_breaking_changes(module_name), 'requires': ['documentation']},
+        ], lambda name, data, results: self.__validate_check(module_name, name, data, results))
+        data_backend = results['backend']
+        data_frontend = results['frontend']
+        data_scripts = results['scripts']
+        data_tests = results['tests']
+        data_changelog = results['changelog']
+        data_code_quality = results['code quality']
         data_test = {
             'score': 0.0
         }
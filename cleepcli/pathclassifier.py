@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import re
+import logging
+from collections import namedtuple
+from functools import lru_cache
+from . import config
+
+PathClassification = namedtuple(
+    'PathClassification',
+    ['drop_reason', 'category', 'module', 'area', 'frontend'],
+)
+
+class PathClassifier():
+    """
+    Classify Cleep sources paths for watchdog
+
+    Patterns are compiled once from config and each path is classified in a single pass. Results are
+    cached in a bounded LRU cache (classification only depends on path).
+    """
+
+    REJECTED_FILENAMES = [
+        '4913',  # vim furtive temp file to check user permissions
+        '.gitignore',
+    ]
+    REJECTED_EXTENSIONS = [
+        '.swp',  # vim
+        '.swpx',  # vim
+        '.swx',  # vim
+        '.tmp',  # generic?
+        '.offset',  # pygtail
+        '.pyc',  # python compiled
+        '.log',  # log file
+    ]
+    REJECTED_PREFIXES = ['.', '~']
+    REJECTED_SUFFIXES = ['~']
+    REJECTED_DIRS = [
+        '.git',
+        '.vscode',
+        '.editor',
+        '__pycache__',
+    ]
+
+    CHANGE_FRONTEND = 'frontend asset'
+    CHANGE_DESC = 'desc.json'
+    CHANGE_MODULE_BACKEND = 'module backend'
+    CHANGE_CORE = 'core'
+    CHANGE_SCRIPT = 'script'
+    CHANGE_TEST = 'test file'
+
+    AREA_CORE = 'core'
+    AREA_BIN = 'bin'
+    AREA_HTML = 'html'
+    AREA_MODULE = 'module'
+
+    DROP_USELESS = 'useless change'
+
+    CACHE_SIZE = 4096
+
+    def __init__(self, cache_size=None):
+        """
+        Constructor
+
+        Args:
+            cache_size (int): max number of classifications kept in cache (default CACHE_SIZE)
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        # fast rejection checks (str methods), reason is only computed for rejected paths
+        self.__rejected_prefixes = tuple(self.REJECTED_PREFIXES)
+        self.__rejected_endings = tuple(self.REJECTED_EXTENSIONS + self.REJECTED_SUFFIXES + self.REJECTED_FILENAMES)
+        self.__rejected_dirs_re = re.compile(
+            r'(?:^|/)(?:%s)(?:/|$)' % '|'.join([re.escape(folder) for folder in self.REJECTED_DIRS])
+        )
+        # each alternative is wrapped in a named group to get it with match lastgroup
+        self.__change_re = re.compile('|'.join([
+            r'(?P<core_tests>%s/tests/.*)' % re.escape(config.CORE_SRC),
+            r'(?P<core>%s/(?!tests|modules).*\.py)' % re.escape(config.CORE_SRC),
+            r'(?P<html>%s/.*)' % re.escape(config.HTML_SRC),
+            r'(?P<bin>%s/cleep.*)' % re.escape(config.BIN_SRC),
+            r'(?P<module>%s/([^/]+)/(frontend|backend|scripts|tests)/(.*))' % re.escape(config.MODULES_SRC),
+        ]) + '$')
+
+        self.classify = lru_cache(maxsize=cache_size or self.CACHE_SIZE)(self.__classify)
+
+    def __classify(self, path):
+        """
+        Classify specified path
+
+        Args:
+            path (string): path to classify
+
+        Returns:
+            PathClassification: path classification::
+
+                (
+                    drop_reason (string): reason why path is dropped (None if path is not dropped)
+                    category (string): change category (CHANGE_XXX, None if path is dropped)
+                    module (string): module name (None if path is not in a module)
+                    area (string): path area (AREA_XXX, None if path is dropped)
+                    frontend (bool): True if path is a frontend path
+                )
+
+        """
+        if (
+            path.endswith(self.__rejected_endings)
+            or path.startswith(self.__rejected_prefixes)
+            or path == '.'
+            or self.__rejected_dirs_re.search(path)
+        ):
+            return PathClassification(self.__get_rejected_reason(path), None, None, None, False)
+
+        change = self.__change_re.match(path)
+        if not change:
+            return PathClassification(self.DROP_USELESS, None, None, None, False)
+
+        area = change.lastgroup
+        if area == 'module':
+            module_name, part, module_path = change.group(6, 7, 8)
+            if part == 'tests':
+                category = self.CHANGE_TEST
+            elif part == 'scripts':
+                category = self.CHANGE_SCRIPT
+            elif part == 'backend':
+                category = self.CHANGE_MODULE_BACKEND
+            elif module_path.rsplit('/', 1)[-1] == 'desc.json':
+                category = self.CHANGE_DESC
+            else:
+                category = self.CHANGE_FRONTEND
+            return PathClassification(None, category, module_name, self.AREA_MODULE, part == 'frontend')
+
+        if area == 'core_tests':
+            return PathClassification(None, self.CHANGE_TEST, None, self.AREA_CORE, False)
+        if area == 'html':
+            return PathClassification(None, self.CHANGE_FRONTEND, None, self.AREA_HTML, True)
+        if area == 'bin':
+            return PathClassification(None, self.CHANGE_CORE, None, self.AREA_BIN, False)
+        return PathClassification(None, self.CHANGE_CORE, None, self.AREA_CORE, False)
+
+    def __get_rejected_reason(self, path):
+        """
+        Return why path is rejected
+
+        Args:
+            path (string): rejected path
+
+        Returns:
+            string: rejection reason
+        """
+        if path == '.':
+            return 'root'
+        if path.endswith(tuple(self.REJECTED_EXTENSIONS)):
+            return 'extension'
+        if path.startswith(self.__rejected_prefixes):
+            return 'prefix'
+        if path.endswith(tuple(self.REJECTED_SUFFIXES)):
+            return 'suffix'
+        if path.endswith(tuple(self.REJECTED_FILENAMES)):
+            return 'filename'
+        return 'directory'
+
+    def is_rejected(self, path):
+        """
+        Return True if path is rejected (temporary, hidden, compiled files...)
+
+        Args:
+            path (string): path to check
+
+        Returns:
+            bool: True if path is rejected
+        """
+        drop_reason = self.classify(path).drop_reason
+        return drop_reason is not None and drop_reason != self.DROP_USELESS
@@ -0,0 +1,329 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import hashlib
+import logging
+from fnmatch import fnmatchcase
+
+class Sync():
+    """
+    Synchronize files from source to destination (like rsync -a) without spawning any process
+
+    Files are compared using size and modification time (or content hash if checksum enabled).
+    Exclude patterns follow rsync rules:
+        - pattern ending with "/" only matches directories
+        - pattern starting with "/" is anchored to synchronized root
+        - pattern containing "/" is matched against relative path, otherwise against file name
+    Excluded files are never copied nor deleted. Destination symlinks to directories are kept (like
+    rsync --keep-dirlinks option)
+    """
+
+    TMP_SUFFIX = '.cleepclisync'
+
+    def __init__(self, checksum=False):
+        """
+        Constructor
+
+        Args:
+            checksum (bool): compare files content hash instead of modification time
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.checksum = checksum
+
+    def sync(self, src, dst, excludes=None, delete=False):
+        """
+        Synchronize source to destination
+
+        Args:
+            src (string): source directory (or file)
+            dst (string): destination directory (or file)
+            excludes (list): list of exclude patterns
+            delete (bool): delete destination files that don't exist in source
+
+        Returns:
+            dict: synchronization changes (paths relative to destination)::
+
+                {
+                    copied (list): list of copied files
+                    deleted (list): list of deleted files
+                }
+
+        """
+        rules = self.__compile_excludes(excludes or [])
+        changes = {
+            'copied': [],
+            'deleted': [],
+        }
+
+        if not os.path.isdir(src):
+            # single file
+            if self.__sync_entry(src, dst):
+                changes['copied'].append(os.path.basename(dst))
+            return changes
+
+        os.makedirs(dst, exist_ok=True)
+        self.__sync_dir(src, dst, '', rules, delete, changes)
+        self.logger.trace('Sync "%s" to "%s": %s', src, dst, changes)
+
+        return changes
+
+    def sync_paths(self, src, dst, relpaths, excludes=None, delete=False):
+        """
+        Synchronize only specified paths of source directory to destination directory
+
+        Args:
+            src (string): source directory
+            dst (string): destination directory
+            relpaths (list): list of paths relative to source directory (files or directories)
+            excludes (list): list of exclude patterns
+            delete (bool): delete destination paths that don't exist anymore in source
+
+        Returns:
+            dict: synchronization changes (same as sync function)
+        """
+        rules = self.__compile_excludes(excludes or [])
+        changes = {
+            'copied': [],
+            'deleted': [],
+        }
+
+        for relpath in relpaths:
+            relpath = os.path.normpath(relpath)
+            src_path = os.path.join(src, relpath)
+            dst_path = os.path.join(dst, relpath)
+            src_exists = os.path.lexists(src_path)
+            is_dir = os.path.isdir(src_path if src_exists else dst_path) and not os.path.islink(src_path)
+            if self.__is_path_excluded(rules, relpath, is_dir):
+                continue
+
+            if not src_exists:
+                if delete and os.path.lexists(dst_path):
+                    self.__remove(dst_path)
+                    changes['deleted'].append(relpath)
+                continue
+
+            os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+            if is_dir:
+                if os.path.lexists(dst_path) and not os.path.isdir(dst_path):
+                    self.__remove(dst_path)
+                os.makedirs(dst_path, exist_ok=True)
+                self.__sync_dir(src_path, dst_path, relpath, rules, delete, changes)
+            elif self.__sync_entry(src_path, dst_path):
+                changes['copied'].append(relpath)
+
+        self.logger.trace('Sync paths of "%s" to "%s": %s', src, dst, changes)
+
+        return changes
+
+    def __compile_excludes(self, excludes):
+        """
+        Compile exclude patterns
+
+        Args:
+            excludes (list): list of exclude patterns
+
+        Returns:
+            list: list of rules::
+
+                [
+                    (pattern (string), dir only (bool), anchored (bool), match path (bool)),
+                    ...
+                ]
+
+        """
+        rules = []
+        for exclude in excludes:
+            dir_only = exclude.endswith('/')
+            anchored = exclude.startswith('/')
+            pattern = exclude.strip('/')
+            rules.append((pattern, dir_only, anchored, '/' in pattern))
+
+        return rules
+
+    def __is_excluded(self, rules, relpath, is_dir):
+        """
+        Check if path is excluded
+
+        Args:
+            rules (list): compiled exclude rules
+            relpath (string): path relative to synchronized root
+            is_dir (bool): True if path is a directory
+
+        Returns:
+            bool: True if path is excluded
+        """
+        name = os.path.basename(relpath)
+        for pattern, dir_only, anchored, match_path in rules:
+            if dir_only and not is_dir:
+                continue
+            if anchored:
+                matched = fnmatchcase(relpath, pattern)
+            elif match_path:
+                matched = fnmatchcase(relpath, pattern) or fnmatchcase(relpath, '*/' + pattern)
+            else:
+                matched = fnmatchcase(name, pattern)
+            if matched:
+                return True
+
+        return False
+
+    def __is_path_excluded(self, rules, relpath, is_dir):
+        """
+        Check if path or one of its parent directories is excluded
+
+        Args:
+            rules (list): compiled exclude rules
+            relpath (string): path relative to synchronized root
+            is_dir (bool): True if path is a directory
+
+        Returns:
+            bool: True if path is excluded
+        """
+        parts = relpath.split(os.sep)
+        for index in range(len(parts)):
+            last = index == len(parts) - 1
+            if self.__is_excluded(rules, os.sep.join(parts[:index + 1]), is_dir if last else True):
+                return True
+
+        return False
+
+    def __sync_dir(self, src_dir, dst_dir, relpath, rules, delete, changes):
+        """
+        Synchronize directory content (recursive)
+
+        Args:
+            src_dir (string): source directory
+            dst_dir (string): destination directory
+            relpath (string): directory path relative to synchronized root
+            rules (list): compiled exclude rules
+            delete (bool): delete destination files that don't exist in source
+            changes (dict): changes to fill
+        """
+        src_entries = {}
+        with os.scandir(src_dir) as entries:
+            for entry in entries:
+                entry_relpath = os.path.join(relpath, entry.name)
+                if not self.__is_excluded(rules, entry_relpath, entry.is_dir(follow_symlinks=False)):
+                    src_entries[entry.name] = entry
+        with os.scandir(dst_dir) as entries:
+            dst_entries = {entry.name: entry for entry in entries}
+
+        for name, src_entry in src_entries.items():
+            entry_relpath = os.path.join(relpath, name)
+            dst_path = os.path.join(dst_dir, name)
+            if src_entry.is_dir(follow_symlinks=False):
+                dst_entry = dst_entries.get(name)
+                if dst_entry and not dst_entry.is_dir():
+                    self.__remove(dst_path)
+                    dst_entry = None
+                if not dst_entry:
+                    os.mkdir(dst_path)
+                    shutil.copymode(src_entry.path, dst_path)
+                self.__sync_dir(src_entry.path, dst_path, entry_relpath, rules, delete, changes)
+            elif self.__sync_entry(src_entry.path, dst_path, src_entry, dst_entries.get(name)):
+                changes['copied'].append(entry_relpath)
+
+        if not delete:
+            return
+
+        for name, dst_entry in dst_entries.items():
+            entry_relpath = os.path.join(relpath, name)
+            if name in src_entries or name.endswith(self.TMP_SUFFIX):
+                continue
+            if self.__is_excluded(rules, entry_relpath, dst_entry.is_dir()):
+                # excluded files are protected from deletion
+                continue
+            self.__remove(dst_entry.path)
+            changes['deleted'].append(entry_relpath)
+
+    def __sync_entry(self, src, dst, src_entry=None, dst_entry=None):
+        """
+        Synchronize single file or symlink
+
+        Args:
+            src (string): source file path
+            dst (string): destination file path
+            src_entry (DirEntry): source entry if available
+            dst_entry (DirEntry): destination entry if available
+
+        Returns:
+            bool: True if file was copied
+        """
+        dst_exists = dst_entry is not None or os.path.lexists(dst)
+        src_is_link = src_entry.is_symlink() if src_entry else os.path.islink(src)
+
+        if src_is_link:
+            target = os.readlink(src)
+            if os.path.islink(dst) and os.readlink(dst) == target:
+                return False
+            if dst_exists:
+                self.__remove(dst)
+            os.symlink(target, dst)
+            return True
+
+        if dst_exists and not self.__is_file_changed(src, dst, src_entry, dst_entry):
+            return False
+
+        if os.path.isdir(dst) and not os.path.islink(dst):
+            self.__remove(dst)
+        tmp_path = dst + self.TMP_SUFFIX
+        shutil.copy2(src, tmp_path, follow_symlinks=False)
+        os.replace(tmp_path, dst)
+
+        return True
+
+    def __is_file_changed(self, src, dst, src_entry=None, dst_entry=None):
+        """
+        Check if destination file differs from source file
+
+        Args:
+            src (string): source file path
+            dst (string): destination file path
+            src_entry (DirEntry): source entry if available
+            dst_entry (DirEntry): destination entry if available
+
+        Returns:
+            bool: True if file changed
+        """
+        if os.path.islink(dst) or not os.path.isfile(dst):
+            return True
+
+        src_stat = src_entry.stat() if src_entry else os.stat(src)
+        dst_stat = dst_entry.stat() if dst_entry else os.stat(dst)
+        if src_stat.st_size != dst_stat.st_size:
+            return True
+        if self.checksum:
+            return self.__hash_file(src) != self.__hash_file(dst)
+
+        return int(src_stat.st_mtime) != int(dst_stat.st_mtime)
+
+    def __hash_file(self, path):
+        """
+        Compute file content hash
+
+        Args:
+            path (string): file path
+
+        Returns:
+            string: file hash
+        """
+        sha1 = hashlib.sha1()
+        with open(path, 'rb') as fdesc:
+            for block in iter(lambda: fdesc.read(65536), b''):
+                sha1.update(block)
+
+        return sha1.hexdigest()
+
+    def __remove(self, path):
+        """
+        Remove file, symlink or directory
+
+        Args:
+            path (string): path to remove
+        """
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
@@ -4,73 +4,46 @@
 import sys
 import os
 import time
-from .console import EndlessConsole, Console, AdvancedConsole
+from .console import EndlessConsole
 import logging
 from . import config
 import importlib
 import re
 import datetime
 import shutil
+import heapq
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .coretestsindex import CoreTestsIndex
+from .coveragereport import CoverageReport
 
 class Test():
     """
     Handle test processes
     """
     COVERAGE_PATH = '/opt/cleep/.coverage'
+    OUTPUT_SEPARATOR = '----------------------------------------------------------------------'
 
     def __init__(self):
         self.logger = logging.getLogger(self.__class__.__name__)
-        self.__endless_command_running = False
         self.__endless_command_return_code = 0
         self.__module_version = None
         self.__stderr = []
         if not os.path.exists(self.COVERAGE_PATH):
             os.makedirs(self.COVERAGE_PATH)
 
-    def __coverage_to_dict(self, stdout):
-        """
-        Convert coverage results to dict
-
-        Args:
-            stdout (string): coverage results
-        """
-        out = {
-            'files': [],
-            'score': 0.0,
-        }
-
-        c = AdvancedConsole()
-        results = c.find_in_string(stdout, r'((?:/.*?)+\.py)\s+(\d+)\s+\d+\s+(\d+)%|^(TOTAL)\s+\d+\s+\d+\s+(\d+)%$')
-        for result in results:
-            groups = list(filter(None, result[1]))
-            if groups[0].startswith('TOTAL'):
-                out['score'] = int(groups[1]) / 10
-            else:
-                out['files'].append({
-                    'file': groups[0],
-                    'statements': int(groups[1]),
-                    'coverage': int(groups[2]),
-                })
-
-        return out
-
     def __reset_stds(self):
         self.__stderr.clear()
 
-    def __quiet_console_callback(self, stdout, stderr):
-        if stderr:
-            self.__stderr.append(stderr)
-
     def __console_callback(self, stdout, stderr):
-        if stdout and stdout.find('----------------------------------------------------------------------') < 0:
-            self.logger.info("  |  " + stdout)
-        if stderr and stderr.find('----------------------------------------------------------------------') < 0:
-            self.logger.info("  | " + stderr)
-        if stderr:
-            self.__stderr.append(stderr)
+        for line in stdout:
+            if line.find(self.OUTPUT_SEPARATOR) < 0:
+                self.logger.info("  |  " + line)
+        for line in stderr:
+            if line.find(self.OUTPUT_SEPARATOR) < 0:
+                self.logger.info("  | " + line)
+        self.__stderr.extend(stderr)
 
     def __console_end_callback(self, return_code, killed):
-        self.__endless_command_running = False
         self.__endless_command_return_code = return_code
 
     def __get_module_version(self, module_name):
@@ -90,12 +63,13 @@ class Test():
             self.logger.exception('Unable to get module version. Is module valid?')
             return None
 
-    def __get_coverage_errors_and_failures(self, test_filepath):
+    def __get_coverage_errors_and_failures(self, test_filepath, stderr):
         """
         Parse coverage output to find errors and failures count
 
         Args:
             test_filepath (string): test_filepath
+            stderr (list): test process stderr lines
 
         Returns:
             tuple: errors and failures count::
@@ -110,7 +84,7 @@ class Test():
 
         # coverage output is stored in stderr
         pattern = r'^FAILED \(((?:failures=(?P<failures>\d+))?|(?:, )?|(?:errors=(?P<errors>\d+))?)*\)$'
-        matches = re.finditer(pattern, '\n'.join(self.__stderr), re.MULTILINE)
+        matches = re.finditer(pattern, '\n'.join(stderr), re.MULTILINE)
         for matchNum, match in enumerate(matches, start=1):
             indexes = match.groupdict()
             errors = indexes['errors'] if indexes['errors'] else 0
@@ -152,31 +126,6 @@ class Test():
         """
         return '%s/%s/tests' % (config.MODULES_SRC, module_name)
 
-    def __coverage_simple_command(self, path, coverage_command, coverage_options='', coverage_file=None, timeout=5.0, quiet=True):
-        coverage_file = 'COVERAGE_FILE=%s ' % coverage_file if coverage_file else ''
-        
-        cmd = """
-cd "%(path)s"
-%(coverage_file)scoverage %(command)s %(options)s
-        """ % {
-            'coverage_file': coverage_file,
-            'path': path,
-            'command': coverage_command,
-            'options': coverage_options,
-        }
-        self.logger.debug('Coverage cmd: %s', cmd)
-        c = Console()
-        res = c.command(cmd, timeout=timeout)
-        if res['returncode'] != 0 or res['killed']:
-            if len(res["stdout"]) == 0 or not res["stdout"][0].startswith("No data to"):
-                self.logger.error('Error during command execution [%s] (killed: %s): %s - %s', res["returncode"], res["killed"], res["stdout"], res["stderr"])
-            return False
-
-        if not quiet and res.get('stderr'):
-            self.logger.warning('Warning on stderr: %s', res.get('stderr'))
-
-        return res
-
     def module_tests(self, module_name, display_coverage=False, copy_to=None, pattern=None):
         """
         Execute module unit tests and display process output on stdout
@@ -209,13 +158,10 @@ cd "%(path)s"
         else:
             cmd = self.__get_tests_cmd_with_coverage(module_tests_path, coverage_file_path)
         self.logger.debug('Test cmd: %s' % cmd)
-        self.__endless_command_running = True
         self.__reset_stds()
-        c = EndlessConsole(cmd, self.__console_callback, self.__console_end_callback)
+        c = EndlessConsole(cmd, self.__console_callback, self.__console_end_callback, bulk=True)
         c.start()
-
-        while self.__endless_command_running:
-            time.sleep(0.25)
+        c.join()
 
         # display coverage report
         if display_coverage:
@@ -276,20 +222,10 @@ python3 -m unittest -k "%s" test_*
         if not os.path.exists(coverage_file):
             raise Exception('No coverage file found. Did tests run ?')
 
-        report = self.__coverage_simple_command(
-            self.__get_module_tests_path(module_name),
-            'report',
-            '-m -i' if missing else '-i',
-            coverage_file,
-            quiet=quiet,
-        )
-        if not report:
-            raise Exception('Error executing coverage report')
-
-        stdout = '\n'.join(report['stdout'])
+        report = CoverageReport(self.__get_module_tests_path(module_name), coverage_file, quiet=quiet)
         if not as_json:
-            return stdout
-        return self.__coverage_to_dict(stdout)
+            return report.report(missing)
+        return report.to_dict()
 
     def __get_core_tests_path(self):
         """
@@ -350,7 +286,105 @@ python3 -m unittest -k "%s" test_*
 
         return files
 
-    def core_tests(self, display_coverage=False, display_test_output=False, xml=False, quiet=True, pattern=None):
+    def __get_estimated_durations(self, files, index):
+        """
+        Return estimated tests duration of each file from tests history
+
+        Args:
+            files (list): list of (filepath, test_filepath)
+            index (CoreTestsIndex): core tests index
+
+        Returns:
+            dict: estimated duration by filepath. Files without history get average duration.
+        """
+        durations = {filepath: index.get_duration(filepath) for filepath, _ in files}
+        knowns = [duration for duration in durations.values() if duration is not None]
+        default = sum(knowns) / len(knowns) if knowns else 1.0
+
+        return {filepath: (default if duration is None else duration) for filepath, duration in durations.items()}
+
+    def __schedule_longest_first(self, files, durations, workers):
+        """
+        Distribute files on workers using longest processing time first scheduling
+
+        Args:
+            files (list): list of (filepath, test_filepath)
+            durations (dict): estimated duration by filepath
+            workers (int): number of workers
+
+        Returns:
+            tuple: files sorted longest first, and files assigned to each worker::
+
+                (sorted files (list), workers files (list of lists), projected makespan (float))
+
+        """
+        sorted_files = sorted(files, key=lambda a_file: (-durations[a_file[0]], a_file[0]))
+        loads = [(0.0, worker) for worker in range(workers)]
+        workers_files = [[] for _ in range(workers)]
+        for a_file in sorted_files:
+            load, worker = heapq.heappop(loads)
+            workers_files[worker].append(a_file)
+            heapq.heappush(loads, (load + durations[a_file[0]], worker))
+
+        return sorted_files, workers_files, max(load for load, _ in loads)
+
+    def __run_core_test_file(self, filepath, test_filepath, display_test_output=False):
+        """
+        Run tests of specified core file. Output is buffered to be displayed at once
+
+        Args:
+            filepath (string): core file path
+            test_filepath (string): test file path
+            display_test_output (bool): keep unit test output
+
+        Returns:
+            dict: test results::
+
+                {
+                    filepath (string): core file path
+                    test_filepath (string): test file path
+                    return_code (int): test process return code
+                    stderr (list): test process stderr lines
+                    output (list): test output lines to display
+                    duration (float): test duration (seconds)
+                }
+
+        """
+        result = {
+            'filepath': filepath,
+            'test_filepath': test_filepath,
+            'return_code': None,
+            'stderr': [],
+            'output': [],
+            'duration': 0.0,
+        }
+
+        def console_callback(stdout, stderr):
+            result['stderr'].extend(stderr)
+            if display_test_output:
+                result['output'].extend(['  |  ' + line for line in stdout if line.find(self.OUTPUT_SEPARATOR) < 0])
+                result['output'].extend(['  | ' + line for line in stderr if line.find(self.OUTPUT_SEPARATOR) < 0])
+
+        def console_end_callback(return_code, killed):
+            result['return_code'] = return_code
+
+        cmd = """
+cd "%(core_tests_path)s"
+coverage run --omit="*/lib/python*/*","*test_*.py" --concurrency=thread --parallel-mode %(test_file)s
+        """ % {
+            'core_tests_path': self.__get_core_tests_path(),
+            'test_file': test_filepath,
+        }
+        self.logger.trace('Test cmd: %s' % cmd)
+        start = time.time()
+        c = EndlessConsole(cmd, console_callback, console_end_callback, bulk=True)
+        c.start()
+        c.join()
+        result['duration'] = time.time() - start
+
+        return result
+
+    def core_tests(self, display_coverage=False, display_test_output=False, xml=False, quiet=True, pattern=None, jobs=None, incremental=False, shard=None):
         """
         Execute core unit tests and display process output on stdout
 
@@ -360,55 +394,86 @@ python3 -m unittest -k "%s" test_*
             xml (bool): use xml coverage command instead of report command
             quiet (bool): display or not coverage.py warnings
             pattern (str): custom pattern to filter files to process
+            jobs (int): number of test files executed concurrently (default cpu count)
+            incremental (bool): only run tests of files changed since last successful run. Previous
+                                coverage results are kept and merged with new ones. Files fingerprints
+                                are only computed in this mode, so first incremental run executes all
+                                tests.
+            shard (tuple): run only a part of files balanced by tests durations (shard index starting at 1,
+                           shards count)
 
         Returns:
             bool: True if process succeed.
         """
         start = int(time.time())
+        jobs = jobs or os.cpu_count() or 1
 
         # clear previous results
-        if self.__coverage_simple_command(self.__get_core_tests_path(), 'erase') == False:
-            self.logger.error('Unable to clear previous tests results')
-            return False
+        if not incremental:
+            try:
+                CoverageReport(self.__get_core_tests_path()).erase()
+            except Exception:
+                self.logger.exception('Unable to clear previous tests results')
+                return False
 
         # get files paths
         core_path = config.CORE_SRC
         files = self.__list_core_files(core_path, pattern)
 
-        # execute tests
-        self.logger.info('Running unit tests...')
+        # keep only files of requested shard (balanced according to tests durations history)
+        index = CoreTestsIndex(core_path)
+        durations = self.__get_estimated_durations(files, index)
+        if shard:
+            shard_index, shard_count = shard
+            _, shards_files, _ = self.__schedule_longest_first(files, durations, shard_count)
+            files = sorted(shards_files[shard_index - 1])
+            self.logger.info('Running shard %d/%d (%d files)', shard_index, shard_count, len(files))
+
+        # compute files fingerprints to detect changes
+        fingerprints = {}
+        files_skipped = []
+        if incremental:
+            fingerprints = {filepath: index.get_fingerprint(filepath, test_filepath) for filepath, test_filepath in files}
+            files_skipped = [(filepath, test_filepath) for filepath, test_filepath in files if index.is_up_to_date(filepath, fingerprints[filepath])]
+            files = [a_file for a_file in files if a_file not in files_skipped]
+            self.logger.info('%d files unchanged since last successful run are skipped', len(files_skipped))
+
+        # execute tests (coverage runs in parallel mode so files can be tested concurrently)
+        # longest tests are started first to reduce total duration
+        self.logger.info('Running unit tests (%d jobs)...', jobs)
+        scheduled_files, _, projected_makespan = self.__schedule_longest_first(files, durations, jobs)
+        results = {}
+        tests_start = time.time()
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = [
+                executor.submit(self.__run_core_test_file, filepath, test_filepath, display_test_output)
+                for filepath, test_filepath in scheduled_files
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                results[result['filepath']] = result
+
+                # display file output at once to not mix concurrent outputs
+                self.logger.info('')
+                self.logger.info(
+                    'Testing %s using %s...',
+                    result['filepath'].replace(core_path+'/', ''),
+                    result['test_filepath'].replace(core_path+'/', ''),
+                )
+                for line in result['output']:
+                    self.logger.info(line)
+                self.logger.info('Duration %s' % str(datetime.timedelta(seconds=int(result['duration']))))
+        actual_makespan = time.time() - tests_start
+
+        # build report following files order
         files_on_error = []
         files_on_success = []
-        console_callback = self.__console_callback if display_test_output else self.__quiet_console_callback
         for filepath, test_filepath in files:
-            reduced_filepath = filepath.replace(core_path+'/', '')
-            reduced_test_filepath = test_filepath.replace(core_path+'/', '')
-            self.logger.info('')
-            self.logger.info('Testing %s using %s...', reduced_filepath, reduced_test_filepath)
-
-            cmd = """
-cd "%(core_tests_path)s"
-coverage run --omit="*/lib/python*/*","*test_*.py" --concurrency=thread --parallel-mode %(test_file)s
-            """ % {
-                'core_tests_path': self.__get_core_tests_path(),
-                'test_file': test_filepath,
-            }
-            self.logger.trace('Test cmd: %s' % cmd)
-            self.__endless_command_running = True
-            self.__reset_stds()
-            c = EndlessConsole(cmd, console_callback, self.__console_end_callback)
-            c.start()
-
-            single_start = int(time.time())
-            while self.__endless_command_running:
-                time.sleep(0.25)
-
-            single_duration = str(datetime.timedelta(seconds=(int(time.time()) - single_start)))
-            self.logger.info('Duration %s' % single_duration)
-
-            if self.__endless_command_return_code!=0:
-                self.logger.debug('Command output:\n%s' % '\n'.join(self.__stderr))
-                errors, failures, exception, notest = self.__get_coverage_errors_and_failures(test_filepath)
+            result = results[filepath]
+            index.update(filepath, fingerprints.get(filepath), result['return_code'] == 0, result['duration'])
+            if result['return_code'] != 0:
+                self.logger.debug('Command output:\n%s' % '\n'.join(result['stderr']))
+                errors, failures, exception, notest = self.__get_coverage_errors_and_failures(test_filepath, result['stderr'])
                 files_on_error.append({
                     'filepath': filepath,
                     'errors': errors,
@@ -420,6 +485,7 @@ coverage run --omit="*/lib/python*/*","*test_*.py" --concurrency=thread --parall
                 files_on_success.append({
                     'filepath': filepath
                 })
+        index.save()
 
         # coverage
         if display_coverage:
@@ -431,7 +497,14 @@ coverage run --omit="*/lib/python*/*","*test_*.py" --concurrency=thread --parall
         self.logger.info('-' * 50)
         self.logger.info('Tests report:')
         self.logger.info('  Duration: %s' % duration)
+        self.logger.info(
+            '  Tests makespan: %s (projected %s)',
+            str(datetime.timedelta(seconds=int(actual_makespan))),
+            str(datetime.timedelta(seconds=int(projected_makespan))),
+        )
         self.logger.info('  %d files succeed' % len(files_on_success))
+        if incremental:
+            self.logger.info('  %d files skipped (unchanged)' % len(files_skipped))
         self.logger.info('  %d files on error' % len(files_on_error))
         if len(files_on_error) != 0:
             for file_on_error in files_on_error:
@@ -452,17 +525,14 @@ coverage run --omit="*/lib/python*/*","*test_*.py" --concurrency=thread --parall
         Returns:
             string or dict according to as_json option
         """
-        # combine results
-        self.__coverage_simple_command(self.__get_core_tests_path(), 'combine', timeout=120.0, quiet=quiet)
+        # combine results (previous results are kept for files skipped by incremental run)
+        report = CoverageReport(self.__get_core_tests_path(), quiet=quiet)
+        report.combine(append=True)
 
         # report results
-        command = "xml" if xml else "report"
-        res = self.__coverage_simple_command(self.__get_core_tests_path(), command, "--ignore-errors", timeout=120.0, quiet=quiet)
-        if res == False:
-            raise Exception('Error generating coverage results')
-
-        stdout = '\n'.join(res.get('stdout', []))
-        if not as_json:
-            return stdout
-        return self.__coverage_to_dict(stdout)
+        if as_json:
+            return report.to_dict()
+        if xml:
+            return report.xml()
+        return report.report()
 
@@ -2,43 +2,98 @@
 # -*- coding: utf-8 -*-
 
 import sys
-import re
 import os
 import time
 import logging
 from . import config
 from watchdog.observers import Observer
-from watchdog.events import PatternMatchingEventHandler, EVENT_TYPE_MODIFIED
+from watchdog.events import (
+    PatternMatchingEventHandler,
+    EVENT_TYPE_MODIFIED,
+    EVENT_TYPE_DELETED,
+    EVENT_TYPE_MOVED,
+)
 import watchdog.events as events
-from threading import Thread
+from threading import Thread, Condition
 from .cleepapi import CleepApi
 from .file import File
-from collections import deque
+from .pathclassifier import PathClassifier
+from .inotifywatcher import InotifyWatcher
+from .watchstats import WatchStats
 
 
 class ActionFileSync:
-    def __init__(self, module=None):
+    def __init__(self, module=None, paths=None, category=None, event_time=None):
         self.module = module
+        self.paths = paths
+        self.category = category
+        self.event_time = event_time
 
 
 class ActionRestart:
-    def __init__(self, frontend=False):
+    def __init__(self, frontend=False, event_time=None):
         self.frontend = frontend
+        self.event_time = event_time
+
+
+class ActionModuleReload:
+    def __init__(self, module, event_time=None):
+        self.module = module
+        self.event_time = event_time
 
 
 class ActionsExecutor(Thread):
     """
     Actions executor
-    Implements queue to execute sequentially actions
+    Debounces actions of a burst of changes and executes them sequentially:
+    syncs are merged and debounced (trailing edge) per target (module or core), each target is synced once
+    no change occured on it during its debounce window. Restarts are collapsed into single backend and/or
+    frontend restart executed once all targets are synced. Modules are reloaded instead of restarting
+    backend when only modules backend changed.
     """
 
-    def __init__(self, rpc_url):
+    DEBOUNCE_WINDOWS = {
+        PathClassifier.CHANGE_FRONTEND: 0.1,
+        PathClassifier.CHANGE_DESC: 0.25,
+        PathClassifier.CHANGE_MODULE_BACKEND: 0.25,
+        PathClassifier.CHANGE_CORE: 0.5,
+        PathClassifier.CHANGE_SCRIPT: 0.25,
+    }
+    DEBOUNCE_NAMES = {
+        "frontend": PathClassifier.CHANGE_FRONTEND,
+        "desc": PathClassifier.CHANGE_DESC,
+        "backend": PathClassifier.CHANGE_MODULE_BACKEND,
+        "core": PathClassifier.CHANGE_CORE,
+        "script": PathClassifier.CHANGE_SCRIPT,
+    }
+    DEFAULT_DEBOUNCE_WINDOW = 0.25  # seconds
+    MAX_DEBOUNCE_DELAY = 2.0  # max seconds target sync is delayed during endless burst
+
+    def __init__(self, rpc_url, debounce_windows=None, stats=None):
+        """
+        Constructor
+
+        Args:
+            rpc_url (str): Cleep RPC url
+            debounce_windows (dict): debounce windows (seconds) by change category to overwrite default ones
+            stats (WatchStats): latency stats recorder (None to disable stats)
+        """
         Thread.__init__(self)
-        Thread.daemon = True
+        self.daemon = True
 
         self.logger = logging.getLogger(self.__class__.__name__)
         self.running = True
-        self.__queue = deque(maxlen=200)
+        self.__condition = Condition()
+        self.debounce_windows = dict(self.DEBOUNCE_WINDOWS)
+        self.debounce_windows.update(debounce_windows or {})
+        # pending syncs by target: module name (None for core) => sync::
+        #   {paths (dict): paths (None for full sync), deadline (float), first (float): first action time,
+        #    event_time (float): first event time}
+        self.__syncs = {}
+        self.__restarts = set()
+        self.__reloads = set()
+        self.__restarts_event_time = None
+        self.stats = stats
         self.file = File()
         self.cleep = CleepApi(rpc_url)
 
@@ -46,49 +101,196 @@ class ActionsExecutor(Thread):
         """
         Stop process
         """
-        self.running = False
+        with self.__condition:
+            self.running = False
+            self.__condition.notify()
 
     def add_action(self, action):
         """
-        Add an action to execute
+        Add an action to execute (merged with pending actions)
+        """
+        with self.__condition:
+            if isinstance(action, ActionFileSync):
+                now = time.monotonic()
+                window = self.debounce_windows.get(action.category, self.DEFAULT_DEBOUNCE_WINDOW)
+                sync = self.__syncs.setdefault(
+                    action.module,
+                    {"paths": {}, "deadline": now, "first": now, "event_time": action.event_time},
+                )
+                if not action.paths:
+                    sync["paths"] = None
+                elif sync["paths"] is not None:
+                    sync["paths"].update(dict.fromkeys(action.paths))
+                sync["deadline"] = max(sync["deadline"], now + window)
+            elif isinstance(action, ActionRestart):
+                self.__restarts.add("frontend" if action.frontend else "backend")
+            elif isinstance(action, ActionModuleReload):
+                self.__reloads.add(action.module)
+
+            if not isinstance(action, ActionFileSync) and action.event_time:
+                self.__restarts_event_time = min(
+                    self.__restarts_event_time or action.event_time, action.event_time
+                )
+            self.__condition.notify()
+
+    def __has_pending_restarts(self):
+        """
+        Return True if restarts or reloads are pending
+
+        Returns:
+            bool: True if restarts pending
+        """
+        with self.__condition:
+            return bool(self.__restarts or self.__reloads)
+
+    def __wait_actions(self):
+        """
+        Wait for settled targets to sync, or for restarts once all targets are synced
+
+        Returns:
+            tuple: settled syncs (dict), restarts (set), modules to reload (set) and first restart event
+                   time (float), or (None, None, None, None) if executor is stopped
+        """
+        with self.__condition:
+            while self.running:
+                if not self.__syncs:
+                    if self.__restarts or self.__reloads:
+                        restarts, reloads = self.__restarts, self.__reloads
+                        event_time = self.__restarts_event_time
+                        self.__restarts, self.__reloads = set(), set()
+                        self.__restarts_event_time = None
+                        return {}, restarts, reloads, event_time
+                    self.__condition.wait()
+                    continue
+
+                now = time.monotonic()
+                fire_times = {
+                    module: min(sync["deadline"], sync["first"] + self.MAX_DEBOUNCE_DELAY)
+                    for module, sync in self.__syncs.items()
+                }
+                settled = [module for module, fire_time in fire_times.items() if fire_time <= now]
+                if not settled:
+                    self.__condition.wait(min(fire_times.values()) - now)
+                    continue
+
+                syncs = {module: self.__syncs.pop(module) for module in settled}
+                return syncs, set(), set(), None
+
+        return None, None, None, None
+
+    def __execute_sync(self, module, paths):
         """
-        self.__queue.appendleft(action)
+        Execute sync
 
-    def __execute_action(self, action):
+        Args:
+            module (string): module name (None for core)
+            paths (list): list of paths to sync (None for full sync)
         """
-        Execute specified action
+        if paths and self.file.paths_sync(paths):
+            # only changed paths synced
+            return
+
+        # full sync (fallback when paths sync failed)
+        if module is None:
+            self.file.core_sync()
+        else:
+            self.file.module_sync(module)
+
+    def __execute_restarts(self, restarts, reloads):
+        """
+        Execute cheapest restarts according to changes, logging each decision with its duration
 
         Args:
-            action (dict): action to execute
+            restarts (set): restarts to execute (backend and/or frontend)
+            reloads (set): modules to reload
+        """
+        restart_backend = "backend" in restarts
+        if restart_backend and reloads:
+            self.logger.info(
+                "Decision: skip modules %s reload, backend restart required by core change"
+                % ", ".join(sorted(reloads))
+            )
+        elif reloads:
+            for module in sorted(reloads):
+                start = time.monotonic()
+                reloaded = self.cleep.reload_module(module)
+                self.__record(WatchStats.STAGE_RELOAD, start, target=module)
+                if reloaded:
+                    self.logger.info(
+                        'Decision: reload module "%s" (took %.2f seconds)'
+                        % (module, time.monotonic() - start)
+                    )
+                    continue
+                self.logger.info(
+                    'Decision: restart backend, module "%s" reload not supported or failed (took %.2f seconds)'
+                    % (module, time.monotonic() - start)
+                )
+                restart_backend = True
+                break
+
+        if restart_backend:
+            start = time.monotonic()
+            self.cleep.restart_backend()
+            self.__record(WatchStats.STAGE_RESTART_BACKEND, start)
+            self.logger.info(
+                "Decision: restart backend (took %.2f seconds)" % (time.monotonic() - start)
+            )
+
+        if "frontend" in restarts:
+            start = time.monotonic()
+            self.cleep.restart_frontend()
+            self.__record(WatchStats.STAGE_RESTART_FRONTEND, start)
+            self.logger.info(
+                "Decision: restart frontend (took %.2f seconds)" % (time.monotonic() - start)
+            )
+
+    def __record(self, stage, start, **infos):
         """
-        if isinstance(action, ActionFileSync):
-            if action.module is None:
-                self.file.core_sync()
-            else:
-                self.file.module_sync(action.module)
-
-        elif isinstance(action, ActionRestart):
-            if action.frontend:
-                self.cleep.restart_frontend()
-            else:
-                self.cleep.restart_backend()
+        Record stage duration if stats are enabled
+
+        Args:
+            stage (string): stage name (see WatchStats)
+            start (float): stage start time (monotonic)
+            infos (dict): extra trace infos
+        """
+        if self.stats and start is not None:
+            self.stats.record(stage, time.monotonic() - start, **infos)
 
     def run(self):
         """
-        Main process: unqueue action and process it
+        Main process: wait for actions and process them
         """
         while self.running:
-            try:
-                action = self.__queue.pop()
-                self.__execute_action(action)
-
-            except IndexError:
-                # no action available
-                time.sleep(0.25)
+            syncs, restarts, reloads, restarts_event_time = self.__wait_actions()
+            if syncs is None:
+                break
 
+            self.logger.debug(
+                "Executing %s sync(s), %s restart(s) and %s reload(s)"
+                % (len(syncs), len(restarts), len(reloads))
+            )
+            for module, sync in syncs.items():
+                start = time.monotonic()
+                if self.stats and sync["event_time"]:
+                    self.stats.record(WatchStats.STAGE_QUEUE, start - sync["event_time"], target=module)
+                try:
+                    paths = sync["paths"]
+                    self.__execute_sync(module, list(paths) if paths else None)
+                except:
+                    # error occured during action execution
+                    self.logger.exception("Error during sync execution:")
+                self.__record(WatchStats.STAGE_SYNC, start, target=module)
+                if self.stats and not self.__has_pending_restarts():
+                    self.__record(WatchStats.STAGE_TOTAL, sync["event_time"], target=module)
+
+            if not restarts and not reloads:
+                continue
+            try:
+                self.__execute_restarts(restarts, reloads)
             except:
                 # error occured during action execution
-                self.logger.exception("Error during action execution:")
+                self.logger.exception("Error during restart execution:")
+            self.__record(WatchStats.STAGE_TOTAL, restarts_event_time)
 
 
 class CleepHandler(PatternMatchingEventHandler):
@@ -96,34 +298,12 @@ class CleepHandler(PatternMatchingEventHandler):
     Watchdog handler for Cleep
     """
 
-    REJECTED_FILENAMES = [
-        "4913",  # vim furtive temp file to check user permissions
-        ".gitignore",
-    ]
-    REJECTED_EXTENSIONS = [
-        ".swp",  # vim
-        ".swpx",  # vim
-        ".swx",  # vim
-        ".tmp",  # generic?
-        ".offset",  # pygtail
-        ".pyc",  # python compiled
-        ".log",  # log file
-    ]
-    REJECTED_PREFIXES = [".", "~"]
-    REJECTED_SUFFIXES = ["~"]
-    REJECTED_DIRS = [
-        ".git",
-        ".vscode",
-        ".editor",
-        "__pycache__",
-    ]
-    DEBOUNCE = 0.25  # seconds
-
-    def __init__(self, actions_executor):
+    def __init__(self, actions_executor, stats=None):
         super().__init__(ignore_patterns=["(\.git|__pycache__|.vscode|.editor)"])
-        self.__last_times = {"backend": 0, "frontend": 0}
         self.logger = logging.getLogger(self.__class__.__name__)
         self.actions_executor = actions_executor
+        self.classifier = PathClassifier()
+        self.stats = stats
 
     def __is_event_dropped(self, event):
         """
@@ -131,201 +311,130 @@ class CleepHandler(PatternMatchingEventHandler):
         Return:
             bool: True if event must be dropped
         """
-        # drop dir modified event or created file (that always comes with modified file)
-        if type(event) in (events.DirModifiedEvent, events.FileCreatedEvent):
-            self.logger.debug(" Filtered: DirModifiedEvent or FileCreatedEvent")
-            return True
-
-        if event.event_type != EVENT_TYPE_MODIFIED:
-            self.logger.debug(" Filtered: not modified event type")
-            return True
-
         # filter invalid event
         if not event:
             self.logger.debug(" Filtered: invalid event")
             return True
 
-        # filter on non
-
-        # filter event on current script
-        if event.src_path == ".%s" % __file__:
-            self.logger.debug(" Filtered: event on current script")
-            return True
-
-        # filter root event
-        if event.src_path == ".":
-            self.logger.debug(" Filtered: root event")
+        # drop dir modified/created event or created file (that always comes with modified file)
+        if type(event) in (
+            events.DirModifiedEvent,
+            events.DirCreatedEvent,
+            events.FileCreatedEvent,
+        ):
+            self.logger.debug(
+                " Filtered: DirModifiedEvent, DirCreatedEvent or FileCreatedEvent"
+            )
             return True
 
-        # filter invalid extension
-        src_ext = os.path.splitext(event.src_path)[1]
-        if src_ext in self.REJECTED_EXTENSIONS:
-            self.logger.debug(" Filtered: invalid extension")
+        if event.event_type not in (
+            EVENT_TYPE_MODIFIED,
+            EVENT_TYPE_DELETED,
+            EVENT_TYPE_MOVED,
+        ):
+            self.logger.debug(" Filtered: not modified, deleted or moved event type")
             return True
 
-        # filter by prefix
-        for prefix in self.REJECTED_PREFIXES:
-            if event.src_path.startswith(prefix):
-                self.logger.debug(" Filtered: source prefix")
-                return True
-            if getattr(event, "dest_path", None) and event.dest_path.startswith(prefix):
-                self.logger.debug(" Filtered: destination prefix")
-                return True
-
-        # filter by suffix
-        for suffix in self.REJECTED_SUFFIXES:
-            if event.src_path.endswith(suffix):
-                self.logger.debug("Filtered: source suffix")
-                return True
-            if getattr(event, "dest_path", None) and event.dest_path.endswith(prefix):
-                self.logger.debug(" Filtered: destination suffix")
-                return True
-
-        # filter by filename
-        for filename in self.REJECTED_FILENAMES:
-            if event.src_path.endswith(filename):
-                self.logger.debug(" Filtered: filename")
-                return True
-
-        # filter by dir
-        parts = event.src_path.split(os.path.sep)
-        for folder in self.REJECTED_DIRS:
-            if folder in parts:
-                self.logger.debug(" Filtered: directory")
-                return True
-
         self.logger.debug(" NotFiltered")
         return False
 
-    def __debounce(self, now, last_time):
-        if now < (last_time + self.DEBOUNCE):
-            return True
-        return False
-
-    def __change_on_module(self, event):
-        """
-        Change on module
-
-        Args:
-            event: watchdog event
-
-        Returns:
-            module name (string) or None if nothing found
-        """
-        pattern = "^%s/(.*?)/(?:frontend|backend|scripts)/.*$" % (config.MODULES_SRC)
-        # self.logger.debug('Module pattern: %s' % pattern)
-
-        if hasattr(event, "src_path"):
-            res = re.findall(pattern, event.src_path)
-            if res and len(res) > 0:
-                return res[0]
-
-        if hasattr(event, "dest_path"):
-            res = re.findall(pattern, event.dest_path)
-            if res and len(res) > 0:
-                return res[0]
-
-        return None
-
-    def __change_on_core(self, event):
+    def __get_event_paths(self, event):
         """
-        Change on core
+        Return event paths to synchronize
 
         Args:
             event: watchdog event
 
         Returns:
-            True if change occurs in core, False otherwise
+            list: list of paths (empty list if event paths are rejected)
         """
-        pattern_core = "^(%s/(?!tests|modules)(.*\.py)|%s/.*)$" % (
-            config.CORE_SRC,
-            config.HTML_SRC,
-        )
-        pattern_bin = "^%s/cleep" % (config.BIN_SRC)
-        # self.logger.debug('Core pattern: %s' % pattern_core)
-        # self.logger.debug('Bin pattern: %s' % pattern_bin)
-
-        if hasattr(event, "src_path"):
-            if re.search(pattern_core, event.src_path):
-                return True
-            if re.search(pattern_bin, event.src_path):
-                return True
-
-        if hasattr(event, "dest_path"):
-            if re.search(pattern_core, event.dest_path):
-                return True
-
-        return False
-
-    def __change_on_frontend(self, event):
+        if event.event_type == EVENT_TYPE_MOVED:
+            if self.classifier.is_rejected(event.dest_path):
+                # file moved to temporary file (editor backup), it will be rewritten soon
+                return []
+            if self.classifier.is_rejected(event.src_path):
+                # temporary file moved to final file (editor atomic save)
+                return [event.dest_path]
+            return [event.src_path, event.dest_path]
+
+        if self.classifier.is_rejected(event.src_path):
+            return []
+        return [event.src_path]
+
+    def __record_delivery(self, event):
         """
-        Detect change on frontend
+        Record event delivery latency (time elapsed since file modification)
 
         Args:
             event: watchdog event
-
-        Returns:
-            True if change on frontend, False otherwise
         """
-        pattern = "^(%s/|%s/(?:.*?)/frontend/).*$" % (
-            config.HTML_SRC,
-            config.MODULES_SRC,
-        )
-        # self.logger.debug('Frontend pattern: %s' % pattern)
-
-        if hasattr(event, "src_path"):
-            res = re.search(pattern, event.src_path)
-            if res:
-                return True
-
-        if hasattr(event, "dest_path"):
-            res = re.search(pattern, event.dest_path)
-            if res:
-                return True
-
-        return False
+        if event.event_type != EVENT_TYPE_MODIFIED or event.is_directory:
+            return
+        try:
+            delay = time.time() - os.stat(event.src_path).st_mtime
+        except OSError:
+            return
+        if 0 <= delay < 60:
+            self.stats.record(WatchStats.STAGE_DELIVERY, delay, path=event.src_path)
 
     def on_any_event(self, event):
         try:
-            now = time.time()
-            self.logger.debug("Event: %s" % event)
-            if not self.__is_event_dropped(event):
-                self.__last_action_time = now
-
-                # is event on backend or frontend ?
-                frontend = self.__change_on_frontend(event)
-
-                # debounce ?
-                if self.__debounce(
-                    now, self.__last_times[("frontend" if frontend else "backend")]
-                ):
-                    self.logger.debug("  Dropped by debounce")
-                    return
-
-                # is event on module ?
-                change_on_core = False
-                change_on_module = self.__change_on_module(event)
-                if change_on_module is None:
-                    change_on_core = self.__change_on_core(event)
-
-                # push action and update last action time
-                if change_on_module:
-                    self.logger.debug('  Change on module "%s"' % change_on_module)
-                    self.actions_executor.add_action(ActionFileSync(change_on_module))
-                elif change_on_core:
-                    self.logger.debug("  Change on core")
-                    self.actions_executor.add_action(ActionFileSync())
+            received = time.monotonic()
+            self.logger.debug("Event: %s", event)
+            if self.__is_event_dropped(event):
+                return
+            if self.stats:
+                self.stats.record_event(event)
+                self.__record_delivery(event)
+
+            paths = self.__get_event_paths(event)
+            if not paths:
+                self.logger.debug("  Dropped due to rejected paths")
+                return
+
+            # group changed paths by module (None for core) and category
+            syncs = {}
+            actions = []
+            for path in paths:
+                classification = self.classifier.classify(path)
+                if classification.drop_reason:
+                    self.logger.debug('  Dropped "%s": %s', path, classification.drop_reason)
+                    continue
+                category, module_name = classification.category, classification.module
+                self.logger.debug('  Change on %s (module %s)', category, module_name)
+
+                if category == PathClassifier.CHANGE_TEST:
+                    self.logger.info('Test file "%s" changed: no sync nor restart', path)
+                    continue
+                syncs.setdefault((module_name, category), []).append(path)
+
+                if category in (PathClassifier.CHANGE_FRONTEND, PathClassifier.CHANGE_DESC):
+                    actions.append(ActionRestart(True, event_time=received))
+                elif category == PathClassifier.CHANGE_MODULE_BACKEND:
+                    actions.append(ActionModuleReload(module_name, event_time=received))
+                elif category == PathClassifier.CHANGE_CORE:
+                    actions.append(ActionRestart(event_time=received))
                 else:
-                    self.logger.debug("  Dropped due to useless change")
-                    return
-                if frontend:
-                    self.logger.debug("  Change on frontend")
-                    self.actions_executor.add_action(ActionRestart(True))
-                    self.__last_times["frontend"] = now
-                else:
-                    self.logger.debug("  Change on backend")
-                    self.actions_executor.add_action(ActionRestart())
-                    self.__last_times["backend"] = now
+                    self.logger.info('Script "%s" changed: sync only, no restart', path)
+
+            if not syncs:
+                self.logger.debug("  Dropped due to useless change")
+                return
+            classified = time.monotonic()
+            if self.stats:
+                self.stats.record(WatchStats.STAGE_CLASSIFICATION, classified - received, paths=paths)
+
+            # push sync actions (only changed paths are synced)
+            for (module, category), module_paths in syncs.items():
+                self.actions_executor.add_action(
+                    ActionFileSync(module, module_paths, category, event_time=received)
+                )
+
+            # push restart actions after syncs (restarts wait for pending syncs)
+            for action in actions:
+                self.actions_executor.add_action(action)
+            if self.stats:
+                self.stats.record(WatchStats.STAGE_ENQUEUE, time.monotonic() - classified)
 
         except:
             self.logger.exception("Error occured during watcher event processing:")
@@ -336,15 +445,18 @@ class CleepWatchdog:
     Cleep core and module watchdog
     """
 
-    def __init__(self, rpc_url):
+    def __init__(self, rpc_url, debounce_windows=None, stats=None):
         """
         Constructor
 
         Args:
             rpc_url (str): Cleep RPC url
+            debounce_windows (dict): debounce windows (seconds) by change category (see ActionsExecutor)
+            stats (WatchStats): latency stats recorder (None to disable stats)
         """
         self.logger = logging.getLogger(self.__class__.__name__)
-        self.actions_executor = ActionsExecutor(rpc_url)
+        self.stats = stats
+        self.actions_executor = ActionsExecutor(rpc_url, debounce_windows, stats)
 
     def watch(self):
         """
@@ -359,17 +471,34 @@ class CleepWatchdog:
             )
             return False
 
-        event_handler = CleepHandler(self.actions_executor)
-        observer = Observer()
-        observer.schedule(event_handler, path, recursive=True)
-        self.logger.info('Cleep watchdog is running on "%s" (CTRL-C to stop)' % path)
-        observer.start()
+        event_handler = CleepHandler(self.actions_executor, self.stats)
+        if self.stats:
+            self.stats.start()
+        start = time.monotonic()
+        if InotifyWatcher.is_supported():
+            observer = InotifyWatcher(event_handler)
+            observer.start()
+            watches = "%d watches" % observer.get_watches_count()
+        else:
+            # fallback to watchdog recursive observer on whole repository
+            observer = Observer()
+            observer.schedule(event_handler, path, recursive=True)
+            observer.start()
+            watches = "recursive watch"
+        self.logger.info(
+            'Cleep watchdog is running on "%s" (%s registered in %.0f ms) (CTRL-C to stop)'
+            % (path, watches, (time.monotonic() - start) * 1000)
+        )
         try:
             while True:
                 time.sleep(0.25)
         except KeyboardInterrupt:
             observer.stop()
             self.actions_executor.stop()
+            if self.stats:
+                self.stats.stop()
         observer.join()
+        if self.stats:
+            self.stats.join()
 
         return True
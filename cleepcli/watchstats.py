@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import time
+import logging
+from collections import deque, OrderedDict
+from threading import Thread, Event, Lock
+
+class WatchStats(Thread):
+    """
+    Watch pipeline latency statistics
+
+    Each stage duration of watch pipeline (event delivery, classification, enqueue, queue wait, sync,
+    restart...) is recorded in a rolling window. Percentiles of each stage are periodically logged and
+    all records are written to a json lines trace file (events records can be replayed by
+    scripts/bench_watch_classifier.py)
+    """
+
+    STAGE_DELIVERY = 'delivery'
+    STAGE_CLASSIFICATION = 'classification'
+    STAGE_ENQUEUE = 'enqueue'
+    STAGE_QUEUE = 'queue'
+    STAGE_SYNC = 'sync'
+    STAGE_RELOAD = 'reload'
+    STAGE_RESTART_BACKEND = 'restart backend'
+    STAGE_RESTART_FRONTEND = 'restart frontend'
+    STAGE_TOTAL = 'total'
+
+    WINDOW_SIZE = 500
+
+    def __init__(self, interval=10.0, trace_path=None):
+        """
+        Constructor
+
+        Args:
+            interval (float): seconds between each stats report
+            trace_path (string): json lines trace file path (no trace if None)
+        """
+        Thread.__init__(self)
+        self.daemon = True
+
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.interval = interval
+        self.trace_path = trace_path
+        self.__lock = Lock()
+        self.__stop_event = Event()
+        self.__samples = OrderedDict()
+        self.__new_samples = False
+        self.__trace = None
+        if trace_path:
+            os.makedirs(os.path.dirname(os.path.abspath(trace_path)), exist_ok=True)
+            self.__trace = open(trace_path, 'a')
+
+    def stop(self):
+        """
+        Stop stats reporting
+        """
+        self.__stop_event.set()
+
+    def record(self, stage, duration, **infos):
+        """
+        Record stage duration
+
+        Args:
+            stage (string): stage name (STAGE_XXX)
+            duration (float): stage duration in seconds
+            infos (dict): extra infos added to trace record (target, paths...)
+        """
+        with self.__lock:
+            self.__samples.setdefault(stage, deque(maxlen=self.WINDOW_SIZE)).append(duration)
+            self.__new_samples = True
+            self.__write_trace(dict(infos, stage=stage, duration=round(duration, 6)))
+
+    def record_event(self, event):
+        """
+        Record received watchdog event in trace (replayable events stream)
+
+        Args:
+            event (FileSystemEvent): watchdog event
+        """
+        with self.__lock:
+            self.__write_trace({
+                'stage': 'event',
+                'event_type': event.event_type,
+                'src_path': event.src_path,
+                'dest_path': getattr(event, 'dest_path', ''),
+                'is_directory': event.is_directory,
+            })
+
+    def __write_trace(self, record):
+        """
+        Write record to trace file (lock must be acquired)
+
+        Args:
+            record (dict): trace record
+        """
+        if not self.__trace:
+            return
+        record['time'] = time.time()
+        self.__trace.write(json.dumps(record) + '\n')
+
+    def __percentile(self, values, percent):
+        """
+        Return percentile of sorted values
+
+        Args:
+            values (list): sorted values
+            percent (int): percentile (0-100)
+
+        Returns:
+            float: percentile value
+        """
+        index = int(round(percent / 100.0 * (len(values) - 1)))
+        return values[min(index, len(values) - 1)]
+
+    def get_stats(self):
+        """
+        Return stages stats over rolling window
+
+        Returns:
+            dict: stats by stage::
+
+                {
+                    stage (string): {
+                        count (int): number of samples
+                        p50 (float): median duration (seconds)
+                        p95 (float): 95th percentile duration (seconds)
+                        max (float): max duration (seconds)
+                    },
+                    ...
+                }
+
+        """
+        with self.__lock:
+            samples = {stage: sorted(values) for stage, values in self.__samples.items()}
+
+        return {
+            stage: {
+                'count': len(values),
+                'p50': self.__percentile(values, 50),
+                'p95': self.__percentile(values, 95),
+                'max': values[-1],
+            }
+            for stage, values in samples.items()
+        }
+
+    def __report(self):
+        """
+        Log stats report
+        """
+        lines = ['Watch stats (last %s samples per stage):' % self.WINDOW_SIZE]
+        lines.append('  %-18s %7s %10s %10s %10s' % ('stage', 'count', 'p50 ms', 'p95 ms', 'max ms'))
+        for stage, stats in self.get_stats().items():
+            lines.append('  %-18s %7d %10.1f %10.1f %10.1f' % (
+                stage, stats['count'], stats['p50'] * 1000, stats['p95'] * 1000, stats['max'] * 1000,
+            ))
+        self.logger.info('\n'.join(lines))
+
+    def run(self):
+        """
+        Main process: periodically report stats
+        """
+        try:
+            stopped = False
+            while not stopped:
+                stopped = self.__stop_event.wait(self.interval)
+                with self.__lock:
+                    new_samples = self.__new_samples
+                    self.__new_samples = False
+                    if self.__trace:
+                        self.__trace.flush()
+                if new_samples:
+                    self.__report()
+        finally:
+            with self.__lock:
+                if self.__trace:
+                    self.__trace.close()
+                    self.__trace = None
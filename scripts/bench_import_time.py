@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Import time benchmark of cleep-cli startup
+
+Loads bin/cleep-cli under "python -X importtime" and runs specified command line (default --version),
+then reports imports done by cleep-cli (interpreter startup is excluded).
+Exits with error if startup exceeds budget or if a forbidden heavy module is imported (subcommands
+must import their dependencies lazily). Default budget targets a desktop computer, increase it with
+--max-ms on slower boards.
+
+Usage:
+    python scripts/bench_import_time.py [--max-ms 150] [--repeat 5] [-- modsync --help]
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+CLI_PATH = os.path.join(REPO_ROOT, 'bin', 'cleep-cli')
+MARKER = '__cleepcli_bench_start__'
+CODE = '''
+import sys, runpy
+sys.stderr.write('%s\\n')
+sys.argv = ['cleep-cli'] + sys.argv[1:]
+try:
+    runpy.run_path(%r)['cli']()
+except SystemExit:
+    pass
+''' % (MARKER, CLI_PATH)
+
+DEFAULT_MAX_MS = 150.0
+DEFAULT_FORBIDDEN = [
+    'github',
+    'requests',
+    'watchdog',
+    'semver',
+    'passlib',
+    'psutil',
+    'cleep',
+]
+
+def run(command):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([REPO_ROOT, os.environ.get('PYTHONPATH', '')]))
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', CODE] + command,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    duration = time.perf_counter() - start
+
+    # keep imports done after marker only (interpreter startup imports are excluded)
+    imports = []
+    started = False
+    for line in proc.stderr.splitlines():
+        if line == MARKER:
+            started = True
+        elif started and line.startswith('import time:') and not line.endswith('imported package'):
+            _, cumulative, name = line[len('import time:'):].split('|')
+            # name is prefixed by one space plus two spaces per nesting level
+            imports.append((name.rstrip()[1:], int(cumulative)))
+
+    return duration, imports
+
+def main():
+    parser = argparse.ArgumentParser(description='Cleep-cli startup import time benchmark')
+    parser.add_argument('--max-ms', type=float, default=DEFAULT_MAX_MS, help='Imports time budget in ms (default %(default)s)')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of runs (best is reported)')
+    parser.add_argument('--forbid', action='append', help='Module that must not be imported (can be repeated, default %s)' % ', '.join(DEFAULT_FORBIDDEN))
+    parser.add_argument('--top', type=int, default=10, help='Number of slowest imports to display')
+    parser.add_argument('command', nargs='*', default=['--version'], help='Cleep-cli command line (default --version)')
+    args = parser.parse_args()
+
+    runs = [run(args.command) for _ in range(args.repeat)]
+    duration, imports = min(runs, key=lambda item: sum([cumulative for name, cumulative in item[1] if not name.startswith(' ')]))
+    top_level = [(name, cumulative) for name, cumulative in imports if not name.startswith(' ')]
+    imports_ms = sum([cumulative for _, cumulative in top_level]) / 1000.0
+
+    print('cleep-cli %s: %d modules imported in %.1f ms (process %.1f ms)' % (
+        ' '.join(args.command), len(imports), imports_ms, duration * 1000,
+    ))
+    for name, cumulative in sorted(top_level, key=lambda item: item[1], reverse=True)[:args.top]:
+        print('  %-40s %8.1f ms' % (name, cumulative / 1000.0))
+
+    errors = []
+    forbidden = args.forbid or DEFAULT_FORBIDDEN
+    imported = set([name.strip() for name, _ in imports])
+    for module in forbidden:
+        if any([name == module or name.startswith(module + '.') for name in imported]):
+            errors.append('Module "%s" is imported at startup' % module)
+    if imports_ms > args.max_ms:
+        errors.append('Imports time %.1f ms exceeds %.1f ms budget' % (imports_ms, args.max_ms))
+
+    for error in errors:
+        print('FAILED: %s' % error)
+    sys.exit(1 if errors else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark of watch events classification
+
+Replays a recorded events stream (json lines, or watch --stats trace) through PathClassifier and
+CleepHandler.
+Without events file, a synthetic stream is generated from REPO_DIR content (one modified event per
+file, like a git checkout or a bulk upload).
+
+Usage:
+    python scripts/bench_watch_classifier.py [--events events.jsonl] [--repeat 5]
+    python scripts/bench_watch_classifier.py --record events.jsonl
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from cleepcli import config
+from cleepcli.pathclassifier import PathClassifier
+from cleepcli.watch import CleepHandler
+import watchdog.events as events
+from watchdog.observers import Observer
+
+EVENT_CLASSES = {
+    ('modified', False): events.FileModifiedEvent,
+    ('modified', True): events.DirModifiedEvent,
+    ('created', False): events.FileCreatedEvent,
+    ('created', True): events.DirCreatedEvent,
+    ('deleted', False): events.FileDeletedEvent,
+    ('deleted', True): events.DirDeletedEvent,
+    ('moved', False): events.FileMovedEvent,
+    ('moved', True): events.DirMovedEvent,
+}
+
+class NullExecutor():
+    def add_action(self, action):
+        pass
+
+class Recorder(events.FileSystemEventHandler):
+    def __init__(self, fdesc):
+        self.fdesc = fdesc
+
+    def on_any_event(self, event):
+        if (event.event_type, event.is_directory) not in EVENT_CLASSES:
+            return
+        self.fdesc.write(json.dumps({
+            'event_type': event.event_type,
+            'src_path': event.src_path,
+            'dest_path': getattr(event, 'dest_path', ''),
+            'is_directory': event.is_directory,
+        }) + '\n')
+
+def record(events_path):
+    with open(events_path, 'w') as fdesc:
+        observer = Observer()
+        observer.schedule(Recorder(fdesc), config.REPO_DIR, recursive=True)
+        observer.start()
+        print('Recording events of "%s" to "%s" (CTRL-C to stop)' % (config.REPO_DIR, events_path))
+        try:
+            while True:
+                time.sleep(0.25)
+        except KeyboardInterrupt:
+            observer.stop()
+        observer.join()
+
+def load_events(events_path):
+    if events_path:
+        with open(events_path) as fdesc:
+            records = [json.loads(line) for line in fdesc if line.strip()]
+        # watch stats trace also contains stages records
+        return [record for record in records if 'event_type' in record]
+
+    stream = []
+    for root, _, filenames in os.walk(config.REPO_DIR):
+        for filename in filenames:
+            stream.append({
+                'event_type': 'modified',
+                'src_path': os.path.join(root, filename),
+                'dest_path': '',
+                'is_directory': False,
+            })
+    return stream
+
+def to_event(item):
+    event_class = EVENT_CLASSES[(item['event_type'], item.get('is_directory', False))]
+    if item['event_type'] == 'moved':
+        return event_class(item['src_path'], item['dest_path'])
+    return event_class(item['src_path'])
+
+def bench(name, func, items, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        durations.append(time.perf_counter() - start)
+    best = min(durations)
+    print('%-22s %8.1f ms  %7.2f us/event' % (name, best * 1000, best * 1000000 / max(len(items), 1)))
+
+def main():
+    parser = argparse.ArgumentParser(description='Watch events classification micro-benchmark')
+    parser.add_argument('--events', help='Recorded events file (json lines)')
+    parser.add_argument('--record', help='Record REPO_DIR events to specified file')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of replays (best is reported)')
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.record)
+        return
+
+    logging.disable(logging.CRITICAL)
+    stream = load_events(args.events)
+    paths = [item['src_path'] for item in stream] + [item['dest_path'] for item in stream if item['dest_path']]
+    watch_events = [to_event(item) for item in stream]
+    print('Replaying %d events (%d paths) of %s' % (len(stream), len(paths), args.events or config.REPO_DIR))
+
+    classifier = PathClassifier()
+    bench('classifier (uncached)', classifier.classify.__wrapped__, paths, args.repeat)
+    bench('classifier (cached)', classifier.classify, paths, args.repeat)
+    handler = CleepHandler(NullExecutor())
+    bench('handler', handler.on_any_event, watch_events, args.repeat)
+    print('Classifier cache: %s' % (classifier.classify.cache_info(),))
+
+if __name__ == '__main__':
+    main()